@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Shared PostgreSQL connection pool for the maintenance and ingestion scripts
+"""
+import threading
+from contextlib import contextmanager
+
+import psycopg2.pool
+
+# Connection parameters - match your docker-compose settings
+CONNECTION_PARAMS = {
+    'host': 'localhost',
+    'port': 5433,
+    'database': 'football_betting',
+    'user': 'betting_user',
+    'password': 'betting_password'
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(minconn=1, maxconn=8):
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **CONNECTION_PARAMS)
+    return _pool
+
+
+@contextmanager
+def get_conn(autocommit=False):
+    """
+    Borrow a pooled connection for the duration of a `with` block.
+
+    Args:
+        autocommit (bool): Autocommit mode to use while the connection is borrowed.
+
+    Yields:
+        psycopg2 connection, returned to the pool (with any open transaction rolled back) on exit.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        conn.autocommit = autocommit
+        yield conn
+    finally:
+        if not conn.closed:
+            # Leave the connection in the pool's default state for the next borrower
+            if conn.autocommit:
+                conn.autocommit = False
+            else:
+                conn.rollback()
+        pool.putconn(conn)
@@ -1,10 +1,11 @@
 import os
 import joblib
 import argparse
+import numpy as np
 import pandas as pd
 from src.utils import load_config, setup_logger, save_model, save_models
-from src.data_loader import preprocess_fixtures_data
-from src.train_and_save_models import handle_sparse_data
+from src.data_loader import preprocess_fixtures_data, load_league_fixtures
+from src.train_and_save_models import handle_sparse_data, downcast_features, transform_dates_to_days, encode_results
 from src.feature_engineering import generate_features
 from src.train_and_save_models import train_models
 from src.model_ensembling import create_stacking_ensemble, create_voting_ensemble
@@ -12,9 +13,13 @@ from src.evaluate_models import evaluate_model
 from sklearn.model_selection import train_test_split
 from imblearn.combine import SMOTETomek
 from sklearn.preprocessing import StandardScaler
+from sklearn.utils.class_weight import compute_sample_weight
 from src.download_leagues import download_and_process_all_leagues
 from src.download_fixtures import download_and_save_data
 
+# Readable labels of the match outcomes, in class-index order
+PREDICTION_LABELS = ['Home Win', 'Draw', 'Away Win']
+
 # 1. Load configuration and set up logger
 config = load_config('config.yaml')
 logger = setup_logger(config)
@@ -42,28 +47,28 @@ elif data_source_type == 'fixtures':
 
     # Load and preprocess fixtures for prediction
     fixtures_folder = config['paths']['fixtures_data']
-    df_fixtures = pd.DataFrame()
+    fixture_frames = []
 
     # Prepare the team name mappings
     home_team_mapping = {}
     away_team_mapping = {}
 
     for league in config['football_data_org']['competitions']:
-        fixtures_file = os.path.join(fixtures_folder, f"{league}_fixtures.csv")
-        df_league_fixtures, league_home_team_mapping, league_away_team_mapping = preprocess_fixtures_data(pd.read_csv(fixtures_file))
+        df_league_fixtures, league_home_team_mapping, league_away_team_mapping = preprocess_fixtures_data(load_league_fixtures(fixtures_folder, league))
 
         home_team_mapping.update(league_home_team_mapping)
         away_team_mapping.update(league_away_team_mapping)
 
-        df_fixtures = pd.concat([df_fixtures, df_league_fixtures], ignore_index=True)
+        fixture_frames.append(df_league_fixtures)
 
-    df = df_fixtures
+    # Concatenate once after the loop instead of growing the frame per league
+    df = pd.concat(fixture_frames, ignore_index=True) if fixture_frames else pd.DataFrame()
 
 else:
     raise ValueError(f"Invalid data source type specified: {data_source_type}. Please update config.yaml.")
 
-# 4. Save a copy of the original DataFrame before feature engineering
-df_original = df.copy()
+# 4. No defensive copy of the original DataFrame is needed: with Copy-on-Write
+#    enabled, feature engineering works on its own view and copies only on write
 
 # 5. Feature Engineering
 if 'Result' in df.columns and df['Result'].notna().all():
@@ -76,54 +81,61 @@ else:
 
 # Ensure date is numeric
 if 'Date' in df.columns:
-    df['days_since_reference'] = (df['Date'] - pd.Timestamp('1970-01-01')).dt.days
+    df['days_since_reference'] = transform_dates_to_days(df['Date'])
 
 # 6. Encode categorical variables (already handled in preprocessing)
 # Team mappings are returned from preprocessing and stored in home_team_mapping, away_team_mapping.
 
 # 7. Target Encoding (if historical data has results)
 if 'Result' in df.columns:
-    df['Result_Numeric'] = df['Result'].map({'H': 0, 'D': 1, 'A': 2})
+    # H=0, D=1, A=2 (-1 for anything else) plus the mask of 'TBD' fixtures, from one categorical
+    df['Result_Numeric'], is_future = encode_results(df['Result'])
     logger.info("Encoded 'Result' into 'Result_Numeric'.")
 
-# Separate historical and fixtures data
-df_historical = df[df['Result'] != 'TBD']  # Historical data with results
-df_fixtures = df[df['Result'] == 'TBD']    # Future fixtures
+# Separate historical and fixtures data using the int8 codes rather than string comparisons
+df_historical = df.loc[df['Result_Numeric'].to_numpy() >= 0]  # Historical data with results
+df_fixtures = df.loc[is_future]    # Future fixtures
 
 # 8. Train-Test Split for historical data
 if not df_historical.empty:
     y = df_historical['Result_Numeric']
-    X = df_historical.drop(columns=['HG', 'AG', 'Result', 'Result_Numeric'], errors='ignore')
+    X = downcast_features(df_historical.drop(columns=['HG', 'AG', 'Result', 'Result_Numeric'], errors='ignore'))
 
     # 9. Train-Test Split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=config['model_training']['train_test_split']['test_size'], random_state=config['project']['random_state'], stratify=y)
-    X_test_unscaled = X_test.copy()
 
     # 10. Handle Sparse Data
     X_train, X_test = handle_sparse_data(X_train, X_test)
 
-    # 11. Apply SMOTE with Tomek Links for Class Imbalance
-    if config['model_training']['smote']:
+    # 11. Handle Class Imbalance (cost-sensitive weights by default, SMOTETomek as opt-in)
+    sample_weight = None
+    imbalance_handling = config['model_training']['imbalance_handling']
+    if imbalance_handling == 'cost_sensitive':
+        logger.info("Weighting samples by inverse class frequency for class imbalance...")
+        sample_weight = compute_sample_weight('balanced', y_train)
+    elif imbalance_handling == 'smote':
         logger.info("Applying SMOTETomek for class imbalance...")
         smote_tomek = SMOTETomek(random_state=config['project']['random_state'])
         X_train, y_train = smote_tomek.fit_resample(X_train, y_train)
 
     # 12. Scale Features
-    scaler = StandardScaler()
+    scaler = None
     if config['model_training']['scaling']:
         logger.info("Scaling features...")
-        X_train = scaler.fit_transform(X_train)
-        X_test = scaler.transform(X_test)
+        # Scales the float32 arrays in place instead of allocating scaled copies
+        scaler = StandardScaler(copy=False)
+        X_train = scaler.fit_transform(np.ascontiguousarray(X_train, dtype=np.float32))
+        X_test = scaler.transform(np.ascontiguousarray(X_test, dtype=np.float32))
 
     # 13. Train Models
-    models = train_models(X_train, y_train, config)
-    save_models(models, config)
+    models = train_models(X_train, y_train, config, sample_weight=sample_weight)
+    # The scaler is saved with the models so prediction reuses the training statistics
+    save_models(models, config, preprocessors={'scaler': scaler} if scaler is not None else None)
 
     # 14. Evaluate Models
     logger.info("Evaluating models...")
-    for model_name in models:
-        model_file = os.path.join(config['paths']['models_folder'], f"{model_name}.pkl")
-        evaluate_model(model_file, X_test, y_test)
+    for model_name, model in models.items():
+        evaluate_model(model, X_test, y_test, model_name=model_name)
 
     # 15. Ensemble Voting/Stacking
     if config['model_ensembling']['type'] == 'voting':
@@ -135,7 +147,7 @@ if not df_historical.empty:
     else:
         raise ValueError("Invalid ensemble type specified.")
 
-    ensemble_model.fit(X_train, y_train)
+    ensemble_model.fit(X_train, y_train, sample_weight=sample_weight)
     save_model(ensemble_model, os.path.join(config['paths']['models_folder'], 'ensemble_model.pkl'))
 
 else:
@@ -149,16 +161,26 @@ else:
     else:
         raise ValueError("No pre-trained model found, and no historical data to train a new one.")
 
+    # Load the scaler fitted alongside the pre-trained model, if scaling was used
+    scaler_path = os.path.join(config['paths']['models_folder'], 'scaler.pkl')
+    scaler = joblib.load(scaler_path) if os.path.exists(scaler_path) else None
+
 # 16. Generate Predictions for Fixtures
 if not df_fixtures.empty:
     logger.info("Generating predictions for future fixtures...")
 
+    # Loop invariant: number of features the ensemble was trained on
+    model_columns = ensemble_model.estimators_[0].n_features_in_
+
+    # Collect every league's fixtures and aligned features so they can be scored in one batch
+    league_fixtures_list = []
+    league_features = []
+
     for league in config['football_data_org']['competitions']:
         logger.info(f"Processing predictions for {league}")
 
         # Load the fixtures data for the current league
-        fixtures_file = os.path.join(fixtures_folder, f"{league}_fixtures.csv")
-        league_fixtures = pd.read_csv(fixtures_file)
+        league_fixtures = load_league_fixtures(fixtures_folder, league)
 
         if league_fixtures.empty:
             logger.warning(f"No fixtures found for {league}, skipping...")
@@ -182,31 +204,43 @@ if not df_fixtures.empty:
         logger.info(f"Away Team Mapping Sample for {league}: {list(away_team_mapping.items())[:5]}")
         logger.info(f"Home Team values after mapping: {league_fixtures['Home Team'].head()}")
 
-        # Prepare features by dropping unnecessary columns and scaling
+        # Prepare features by dropping unnecessary columns
         X_fixtures = league_fixtures.drop(columns=['Result'], errors='ignore')
-        model_columns = ensemble_model.estimators_[0].n_features_in_
         X_fixtures = X_fixtures.reindex(columns=range(model_columns), fill_value=0)
-        
-        # Initialize scaler and transform the fixture data
-        scaler = StandardScaler()
-        X_fixtures_scaled = scaler.fit_transform(X_fixtures)
-
-        # Perform predictions
-        predictions = ensemble_model.predict(X_fixtures_scaled)
-        probabilities = ensemble_model.predict_proba(X_fixtures_scaled)
-
-        # Prepare output DataFrame with readable team names and prediction details
-        df_readable = league_fixtures[['Date', 'Home Team', 'Away Team']].copy()
-        df_readable['Predictions'] = pd.Series(predictions).map({0: 'Home Win', 1: 'Draw', 2: 'Away Win'})
-        df_readable['Home_Win_Prob'] = probabilities[:, 0]
-        df_readable['Draw_Prob'] = probabilities[:, 1]
-        df_readable['Away_Win_Prob'] = probabilities[:, 2]
-
-        # Save predictions for each league to CSV
+
+        league_fixtures_list.append((league, league_fixtures))
+        league_features.append(X_fixtures.to_numpy(dtype=np.float32))
+
+    if league_features:
+        # Scale with the statistics fitted on the training data and predict all leagues at once
+        X_all = np.vstack(league_features)
+        if scaler is not None:
+            X_all = scaler.transform(X_all)
+        # float32, C-contiguous input halves memory traffic into the estimators' inner loops
+        X_all = np.ascontiguousarray(X_all, dtype=np.float32)
+        probabilities_all = ensemble_model.predict_proba(X_all)
+        predictions_all = ensemble_model.classes_[probabilities_all.argmax(axis=1)]
+
+        # Split the batched results back into per-league blocks
+        boundaries = np.cumsum([len(X) for X in league_features])[:-1]
+        league_results = zip(league_fixtures_list,
+                             np.split(predictions_all, boundaries),
+                             np.split(probabilities_all, boundaries))
+
         output_dir = config['paths']['predictions_output']
         os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, f'predictions_{league}.csv')
-        df_readable.to_csv(output_file, index=False)
-        logger.info(f"Predictions saved to {output_file}")
+
+        for (league, league_fixtures), predictions, probabilities in league_results:
+            # Prepare output DataFrame with readable team names and prediction details
+            df_readable = league_fixtures[['Date', 'Home Team', 'Away Team']].copy()
+            df_readable['Predictions'] = pd.Categorical.from_codes(predictions, categories=PREDICTION_LABELS)
+            df_readable['Home_Win_Prob'] = probabilities[:, 0]
+            df_readable['Draw_Prob'] = probabilities[:, 1]
+            df_readable['Away_Win_Prob'] = probabilities[:, 2]
+
+            # Save predictions for each league to CSV
+            output_file = os.path.join(output_dir, f'predictions_{league}.csv')
+            df_readable.to_csv(output_file, index=False)
+            logger.info(f"Predictions saved to {output_file}")
 else:
     logger.warning("No future fixtures found for predictions.")
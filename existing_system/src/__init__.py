@@ -1,8 +1,15 @@
 # src/__init__.py
 
+import pandas as pd
+
 # Import common utilities and configuration loading
 from .utils import load_config, setup_logger
 
+# Enable Copy-on-Write so derived frames share memory until modified (always on, and the option
+# deprecated, from pandas 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
 # Load configuration from a YAML file
 config = load_config('config.yaml')
 
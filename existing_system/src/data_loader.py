@@ -1,5 +1,50 @@
 import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+# Columns read from league CSVs and their storage types
+LEAGUE_COLUMNS = ['Date', 'Season', 'Home Team', 'Away Team', 'HG', 'AG', 'Result']
+LEAGUE_DTYPES = {
+    'Home Team': 'category',
+    'Away Team': 'category',
+    'HG': 'Int8',
+    'AG': 'Int8',
+    'Result': 'category'
+}
+
+# Text columns always stored as categoricals, and goal columns stored as nullable int8
+CATEGORY_COLUMNS = ['Home Team', 'Away Team', 'Result', 'League']
+GOAL_COLUMNS = ['HG', 'AG']
+
+def optimize_memory(df, category_threshold=0.5):
+    """
+    Reduce the memory footprint of a DataFrame by downcasting numeric columns
+    and storing low-cardinality text columns as categoricals.
+
+    Args:
+        df (pd.DataFrame): DataFrame to optimize.
+        category_threshold (float): Maximum ratio of unique values to rows for a
+            text column to be converted to a categorical.
+
+    Returns:
+        pd.DataFrame: DataFrame with compact dtypes.
+    """
+    n_rows = max(len(df), 1)
+    for col in df.columns:
+        col_type = df[col].dtype
+        is_text = pd.api.types.is_object_dtype(col_type) or pd.api.types.is_string_dtype(col_type)
+
+        if col in GOAL_COLUMNS and pd.api.types.is_numeric_dtype(col_type):
+            df[col] = df[col].astype('Int8')
+        elif is_text and (col in CATEGORY_COLUMNS or df[col].nunique() / n_rows < category_threshold):
+            df[col] = df[col].astype('category')
+        elif pd.api.types.is_integer_dtype(col_type):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        elif pd.api.types.is_float_dtype(col_type):
+            df[col] = pd.to_numeric(df[col], downcast='float')
+
+    return df
 
 def preprocess_fixtures_data(df):
     """
@@ -17,22 +62,45 @@ def preprocess_fixtures_data(df):
     # Drop rows with invalid dates (e.g., NaT)
     df = df.dropna(subset=['Date'])
 
-    # Extract year, month, and day if needed
-    df['year'] = df['Date'].dt.year
-    df['month'] = df['Date'].dt.month
-    df['day'] = df['Date'].dt.day
-
     # Encode 'Home Team' and 'Away Team' as categorical codes
-    home_team_mapping = dict(enumerate(df['Home Team'].astype('category').cat.categories))
-    away_team_mapping = dict(enumerate(df['Away Team'].astype('category').cat.categories))
-    df['Home Team'] = df['Home Team'].astype('category').cat.codes
-    df['Away Team'] = df['Away Team'].astype('category').cat.codes
-    
+    home_teams = df['Home Team'].astype('category')
+    away_teams = df['Away Team'].astype('category')
+    home_team_mapping = dict(enumerate(home_teams.cat.categories))
+    away_team_mapping = dict(enumerate(away_teams.cat.categories))
+
+    # Extract year, month, and day as compact integers and write all new columns in one step
+    dates = df['Date'].dt
+    df = df.assign(**{
+        'year': dates.year.astype(np.int16),
+        'month': dates.month.astype(np.int8),
+        'day': dates.day.astype(np.int8),
+        'Home Team': home_teams.cat.codes,
+        'Away Team': away_teams.cat.codes,
+    })
+
     # Add additional preprocessing steps if necessary
     # For example, handle missing values or standardize column names
+    df = optimize_memory(df)
 
     return df, home_team_mapping, away_team_mapping  # Return mappings
 
+def load_league_fixtures(fixtures_folder, league):
+    """
+    Load the saved fixtures for a league, preferring the Parquet copy over the CSV export.
+
+    Args:
+        fixtures_folder (str): Folder the fixture files were saved to.
+        league (str): Competition code (e.g., 'PL').
+
+    Returns:
+        pd.DataFrame: Fixtures for the league.
+    """
+    parquet_file = os.path.join(fixtures_folder, f"{league}_fixtures.parquet")
+    if os.path.exists(parquet_file):
+        return pd.read_parquet(parquet_file, engine='pyarrow', memory_map=True)
+
+    return pd.read_csv(os.path.join(fixtures_folder, f"{league}_fixtures.csv"))
+
 def load_and_preprocess_data(file_path):
     """
     Load a CSV file and preprocess it by converting date formats and selecting relevant columns.
@@ -43,17 +111,18 @@ def load_and_preprocess_data(file_path):
     Returns:
         pd.DataFrame: Preprocessed DataFrame.
     """
-    # Load the dataset
-    data = pd.read_csv(file_path)
-    
-    # Convert 'Date' to proper datetime format
-    data['Date'] = pd.to_datetime(data['Date'], format='%d/%m/%Y')
+    # Load only the relevant columns with the multi-threaded Arrow reader,
+    # parsing dates and typing columns directly at read time
+    df = pd.read_csv(
+        file_path,
+        engine='pyarrow',
+        usecols=LEAGUE_COLUMNS,
+        dtype=LEAGUE_DTYPES,
+        parse_dates=['Date'],
+        date_format='%d/%m/%Y'
+    )
 
-    # Select relevant columns for analysis
-    columns = ['Date', 'Season', 'Home Team', 'Away Team', 'HG', 'AG', 'Result']
-    df = data[columns]
-
-    return df
+    return optimize_memory(df)
 
 
 def load_all_leagues(data_folder):
@@ -68,18 +137,20 @@ def load_all_leagues(data_folder):
         pd.DataFrame: Combined DataFrame with a 'League' column for each dataset.
     """
     all_files = [f for f in os.listdir(data_folder) if f.endswith('.csv')]
-    df_list = []
-    
-    for file_name in all_files:
-        # Load and preprocess each CSV
+
+    def load_league(file_name):
+        # Load and preprocess each CSV, tagging it with the league while it is still small
         df = load_and_preprocess_data(os.path.join(data_folder, file_name))
-        league_name = file_name.replace('.csv', '')  # Extract league name from filename
-        df['League'] = league_name  # Add a new column for league
-        df_list.append(df)
+        df['League'] = file_name.replace('.csv', '')  # Extract league name from filename
+        return df
+
+    # Read the files concurrently; the Arrow reader releases the GIL while parsing
+    with ThreadPoolExecutor(max_workers=min(len(all_files), os.cpu_count() or 1) or 1) as executor:
+        df_list = list(executor.map(load_league, all_files))
     
     # Combine all DataFrames into one
     combined_df = pd.concat(df_list, ignore_index=True)
-    return combined_df
+    return optimize_memory(combined_df)
 
 # Example Usage
 # data_folder = '../data/'
@@ -2,7 +2,10 @@
 import os
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from src.utils import load_config
 import time
 
@@ -12,6 +15,18 @@ API_KEY = None
 HEADERS = None
 COMPETITIONS = []
 
+# Concurrent competition downloads and the request budget to keep in reserve
+MAX_WORKERS = 8
+MIN_REQUESTS_AVAILABLE = 1
+
+# Shared HTTP session: keeps connections alive and retries rate-limited/failed calls
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 def set_api_config(api_key, competitions):
     global API_KEY, HEADERS, COMPETITIONS
     API_KEY = api_key
@@ -19,44 +34,58 @@ def set_api_config(api_key, competitions):
     COMPETITIONS = competitions
 
 def process_matches(matches, historical):
-    data = []
+    # Build typed columns in a single pass instead of a list of per-match dicts
+    dates, home_teams, away_teams = [], [], []
+    home_goals, away_goals, results = [], [], []
+
     for match in matches:
-        if not historical and match['status'] != 'FINISHED':
-            data.append({
-                'Date': match['utcDate'],
-                'Home Team': match['homeTeam']['name'],
-                'Away Team': match['awayTeam']['name'],
-                'Home Goals': None,
-                'Away Goals': None,
-                'Result': 'TBD'
-            })
-        elif historical and match['status'] == 'FINISHED':
+        # Historical pulls keep finished matches, fixture pulls keep the rest
+        if historical != (match['status'] == 'FINISHED'):
+            continue
+
+        dates.append(match['utcDate'])
+        home_teams.append(match['homeTeam']['name'])
+        away_teams.append(match['awayTeam']['name'])
+
+        if historical:
             # Corrected to extract 'home' and 'away' for full-time score
-            home_goals = match['score'].get('fullTime', {}).get('home', None)
-            away_goals = match['score'].get('fullTime', {}).get('away', None)
+            full_time = match['score'].get('fullTime', {})
+            home_goals.append(full_time.get('home', None))
+            away_goals.append(full_time.get('away', None))
+            results.append(match['score']['winner'])  # 'HOME_TEAM', 'AWAY_TEAM', or 'DRAW'
+        else:
+            home_goals.append(None)
+            away_goals.append(None)
+            results.append('TBD')
 
-            data.append({
-                'Date': match['utcDate'],
-                'Home Team': match['homeTeam']['name'],
-                'Away Team': match['awayTeam']['name'],
-                'Home Goals': home_goals,
-                'Away Goals': away_goals,
-                'Result': match['score']['winner']  # 'HOME_TEAM', 'AWAY_TEAM', or 'DRAW'
-            })
+    if not dates:
+        return pd.DataFrame()
 
-    df = pd.DataFrame(data)
-    if not df.empty:
-        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-    return df
+    return pd.DataFrame({
+        'Date': pd.to_datetime(dates).strftime('%Y-%m-%d'),
+        'Home Team': pd.Categorical(home_teams),
+        'Away Team': pd.Categorical(away_teams),
+        'Home Goals': pd.array(home_goals, dtype='Int8'),
+        'Away Goals': pd.array(away_goals, dtype='Int8'),
+        'Result': pd.Categorical(results)
+    })
 
 
+def throttle(response):
+    """Sleep until the per-minute quota resets when the API reports it is nearly used up."""
+    available = response.headers.get('X-Requests-Available-Minute')
+    if available is not None and int(available) <= MIN_REQUESTS_AVAILABLE:
+        wait = int(response.headers.get('X-RequestCounter-Reset', 60))
+        print(f"API request quota nearly exhausted, waiting {wait}s...")
+        time.sleep(wait)
 
 def get_fixtures_or_historical(league_code, historical=False, start_date=None, end_date=None):
     url = f"{BASE_URL}/competitions/{league_code}/matches"
     params = {"dateFrom": start_date, "dateTo": end_date} if historical else {}
 
-    response = requests.get(url, headers=HEADERS, params=params)
+    response = SESSION.get(url, headers=HEADERS, params=params)
     print(f"API Response Status for {league_code}: {response.status_code}")
+    throttle(response)
 
     if response.status_code == 200:
         matches = response.json().get('matches', [])
@@ -84,22 +113,33 @@ def download_and_save_data(save_dir, historical=False, start_season=None, end_se
         start_date = f"{start_season}-08-01"  # Start of season
         end_date = f"{end_season}-07-31"      # End of season
 
-    for league_code in COMPETITIONS:
-        if historical:
-            df = get_fixtures_or_historical(league_code, historical=True, start_date=start_date, end_date=end_date)
-            file_type = "historical"
-        else:
-            df = get_fixtures_or_historical(league_code, historical=False)
-            file_type = "fixtures"
+    file_type = "historical" if historical else "fixtures"
+
+    def fetch_and_save(league_code):
+        # A competition that still fails after the session's retries is skipped, not fatal to the others
+        try:
+            if historical:
+                df = get_fixtures_or_historical(league_code, historical=True, start_date=start_date, end_date=end_date)
+            else:
+                df = get_fixtures_or_historical(league_code, historical=False)
+        except requests.RequestException as e:
+            print(f"Error fetching data for {league_code}: {e}")
+            return
 
         if not df.empty:
             file_name = f"{league_code}_{file_type}.csv"
             save_path = os.path.join(save_dir, file_name)
             df.to_csv(save_path, index=False)
+            # Columnar copy that keeps dtypes and reloads much faster than the CSV
+            df.to_parquet(save_path.replace('.csv', '.parquet'), engine='pyarrow', compression='snappy', index=False)
             print(f"{file_type.capitalize()} data saved to {save_path}")
         else:
             print(f"No {file_type} data found for {league_code}")
 
+    # Competitions are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(fetch_and_save, COMPETITIONS))
+
 if __name__ == "__main__":
     # Load configuration
     config = load_config('config.yaml')
@@ -1,47 +1,95 @@
 import os
+import json
+import time
+import threading
+import importlib.util
 import requests
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pv
 from datetime import datetime
 from bs4 import BeautifulSoup
+from joblib import Parallel, delayed
+
+# Number of concurrent HTTP downloads (I/O bound, so threads are enough)
+N_DOWNLOAD_JOBS = 16
+
+# On-disk cache of the scraped league codes and how long it stays valid (7 days)
+LEAGUE_CODES_CACHE = '.league_codes.json'
+LEAGUE_CODES_TTL = 7 * 86400
+
+# lxml parses considerably faster than the built-in parser when it is installed
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# One requests.Session per worker thread to reuse TCP/TLS connections
+_thread_local = threading.local()
+
+def get_session():
+    """Return the requests.Session bound to the current thread."""
+    if not hasattr(_thread_local, 'session'):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
+
+def fetch_country_leagues(country, country_url):
+    """Scrape a country page and return the (league_name, league_code) pairs it links to."""
+    response = get_session().get(country_url)
+    soup = BeautifulSoup(response.content, HTML_PARSER)
+
+    # Find leagues and their CSV files
+    leagues = []
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if 'mmz4281' in href and href.endswith('.csv'):
+            league_code = href.split('/')[-1].replace('.csv', '').upper()
+            league_name = a.text.strip()
+            full_league_name = f"{country.capitalize()}_{league_name.replace(' ', '_')}"
+            leagues.append((full_league_name, league_code))
+    return leagues
 
 # Dynamically get available leagues from both 'main' and 'extra' leagues
-def get_league_codes():
+def scrape_league_codes():
     base_url = 'https://www.football-data.co.uk'
     main_countries = ['england', 'scotland', 'germany', 'italy', 'spain', 'france', 'netherlands', 'belgium', 'portugal', 'turkey', 'greece']
     extra_countries = ['argentina', 'austria', 'brazil', 'denmark', 'finland', 'ireland', 'mexico', 'norway', 'poland', 'russia', 'sweden']
+
+    # Main leagues use {country}m.php, extra leagues use {country}.php
+    country_urls = [(country, f'{base_url}/{country}m.php') for country in main_countries]
+    country_urls += [(country, f'{base_url}/{country}.php') for country in extra_countries]
+
+    # Fetch all country pages concurrently; results come back in input order
+    results = Parallel(n_jobs=N_DOWNLOAD_JOBS, backend='threading')(
+        delayed(fetch_country_leagues)(country, country_url) for country, country_url in country_urls
+    )
+
     league_codes = {}
+    for leagues in results:
+        for full_league_name, league_code in leagues:
+            if full_league_name not in league_codes:
+                league_codes[full_league_name] = league_code
+
+    return league_codes
+
+def get_league_codes(cache_path=LEAGUE_CODES_CACHE, ttl=LEAGUE_CODES_TTL):
+    """
+    Return the league codes, reusing the on-disk cache while it is fresh.
+
+    Args:
+        cache_path (str): JSON file holding the last scraped league codes.
+        ttl (int): Maximum age of the cache in seconds before re-scraping.
 
-    # Fetch main leagues using {country}m.php
-    for country in main_countries:
-        country_url = f'{base_url}/{country}m.php'
-        response = requests.get(country_url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find leagues and their CSV files
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if 'mmz4281' in href and href.endswith('.csv'):
-                league_code = href.split('/')[-1].replace('.csv', '').upper()
-                league_name = a.text.strip()
-                full_league_name = f"{country.capitalize()}_{league_name.replace(' ', '_')}"
-                if full_league_name not in league_codes:
-                    league_codes[full_league_name] = league_code
-
-    # Fetch extra leagues using {country}.php
-    for country in extra_countries:
-        country_url = f'{base_url}/{country}.php'
-        response = requests.get(country_url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find leagues and their CSV files
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if 'mmz4281' in href and href.endswith('.csv'):
-                league_code = href.split('/')[-1].replace('.csv', '').upper()
-                league_name = a.text.strip()
-                full_league_name = f"{country.capitalize()}_{league_name.replace(' ', '_')}"
-                if full_league_name not in league_codes:
-                    league_codes[full_league_name] = league_code
+    Returns:
+        dict: Mapping of full league name to football-data.co.uk league code.
+    """
+    if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < ttl:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+
+    league_codes = scrape_league_codes()
+
+    # Only cache a successful scrape
+    if league_codes:
+        with open(cache_path, 'w') as f:
+            json.dump(league_codes, f, indent=2)
 
     return league_codes
 
@@ -54,6 +102,28 @@ COLUMN_RENAMES = {
     'FTAG': 'AG',
     'FTR': 'Result'
 }
+FINAL_COLUMNS = [COLUMN_RENAMES.get(col, col) for col in COLUMNS_TO_KEEP]
+# Columns that uniquely identify a match
+MATCH_KEY_COLUMNS = ['Date', 'Home Team', 'Away Team']
+# Arrow types for the kept columns ('Date' stays a string: older seasons use two-digit years)
+COLUMN_TYPES = {
+    'Date': pa.string(),
+    'HomeTeam': pa.string(),
+    'AwayTeam': pa.string(),
+    'FTHG': pa.int8(),
+    'FTAG': pa.int8(),
+    'FTR': pa.string()
+}
+FINAL_COLUMN_TYPES = {COLUMN_RENAMES.get(col, col): col_type for col, col_type in COLUMN_TYPES.items()}
+
+def read_league_csv(file_path, columns, column_types):
+    """Read only the given columns of a league CSV into an Arrow table with declared types."""
+    convert_options = pv.ConvertOptions(include_columns=columns, column_types=column_types)
+    return pv.read_csv(file_path, convert_options=convert_options)
+
+def match_keys(table):
+    """Join the match key columns into a single string column for set-membership tests."""
+    return pc.binary_join_element_wise(*[table[col] for col in MATCH_KEY_COLUMNS], '|')
 
 # Function to download and save the data
 def download_league_data(season, league_code, league_name, save_dir):
@@ -61,7 +131,7 @@ def download_league_data(season, league_code, league_name, save_dir):
     save_path = os.path.join(save_dir, f"{league_name}_{season}.csv")
 
     try:
-        response = requests.get(base_url)
+        response = get_session().get(base_url)
         response.raise_for_status()
 
         with open(save_path, 'wb') as f:
@@ -80,41 +150,37 @@ def process_and_concatenate_league_data(file_paths, league_name, final_save_dir)
     # Check if final CSV for this league already exists
     final_save_path = os.path.join(final_save_dir, f"{league_name}_all_seasons.csv")
     if os.path.exists(final_save_path):
-        existing_data = pd.read_csv(final_save_path)
+        existing_data = read_league_csv(final_save_path, FINAL_COLUMNS, FINAL_COLUMN_TYPES)
     else:
-        existing_data = pd.DataFrame()
+        existing_data = None
 
     for file_path in file_paths:
         try:
-            df = pd.read_csv(file_path)
-
-            # Keep only relevant columns and rename them
-            df = df[COLUMNS_TO_KEEP]
-            df.rename(columns=COLUMN_RENAMES, inplace=True)
-
-            # Concatenate new data with existing data if available
-            all_seasons.append(df)
+            # Read only the relevant columns as an Arrow table and rename them
+            table = read_league_csv(file_path, COLUMNS_TO_KEEP, COLUMN_TYPES)
+            all_seasons.append(table.rename_columns(FINAL_COLUMNS))
 
         except Exception as e:
             print(f"Error processing file {file_path}: {e}")
 
-    # Concatenate all new DataFrames for the league
+    # Concatenate all new tables for the league
     if all_seasons:
-        new_data = pd.concat(all_seasons, ignore_index=True)
+        new_data = pa.concat_tables(all_seasons)
 
         # Filter out duplicate matches (already present in the existing CSV)
-        if not existing_data.empty:
-            # Merge and filter out existing matches
-            merged_data = pd.merge(new_data, existing_data[['Date', 'Home Team', 'Away Team']], 
-                                   on=['Date', 'Home Team', 'Away Team'], how='left', indicator=True)
-            new_data = merged_data[merged_data['_merge'] == 'left_only'].drop(columns=['_merge'])
-            print(f"New matches found for {league_name}: {len(new_data)}")
-
-        # Concatenate new data with existing data
-        final_data = pd.concat([existing_data, new_data], ignore_index=True)
-
-        # Save the final concatenated DataFrame to CSV
-        final_data.to_csv(final_save_path, index=False)
+        if existing_data is not None and existing_data.num_rows:
+            # Anti-join on the match key: keep only rows whose key is not already stored
+            is_existing = pc.is_in(match_keys(new_data), value_set=match_keys(existing_data))
+            new_data = new_data.filter(pc.invert(is_existing))
+            print(f"New matches found for {league_name}: {new_data.num_rows}")
+
+            # Concatenate new data with existing data
+            final_data = pa.concat_tables([existing_data, new_data])
+        else:
+            final_data = new_data
+
+        # Save the final concatenated table to CSV
+        pv.write_csv(final_data, final_save_path)
         print(f"Updated CSV saved to {final_save_path}")
 
         # Delete individual season CSV files
@@ -134,25 +200,27 @@ def download_and_process_all_leagues(start_season, end_season, save_dir='/conten
     # Fetch dynamic league codes from the website
     league_codes = get_league_codes()
 
-    # Loop over each league and download data for the specified seasons
-    for league_name, league_code in league_codes.items():
-        file_paths = []
-        
-        # Download historical seasons
-        for season in range(start_season, end_season):
-            season_str = f"{str(season)[-2:]}{str(season + 1)[-2:]}"  # Format season as '2324'
-            file_path = download_league_data(season_str, league_code, league_name, save_dir)
-            if file_path:
-                file_paths.append(file_path)
-
-        # Handle current season
-        current_season_str = f"{str(end_season)[-2:]}{str(end_season + 1)[-2:]}"
-        file_path = download_league_data(current_season_str, league_code, league_name, save_dir)
+    # Build every (season, league) download up-front so they can run concurrently
+    # Historical seasons plus the current season, formatted as '2324'
+    seasons = [f"{str(season)[-2:]}{str(season + 1)[-2:]}" for season in range(start_season, end_season + 1)]
+    tasks = [(season_str, league_code, league_name)
+             for league_name, league_code in league_codes.items()
+             for season_str in seasons]
+
+    file_paths = Parallel(n_jobs=N_DOWNLOAD_JOBS, backend='threading')(
+        delayed(download_league_data)(season_str, league_code, league_name, save_dir)
+        for season_str, league_code, league_name in tasks
+    )
+
+    # Group the downloaded files by league, keeping season order
+    league_files = {league_name: [] for league_name in league_codes}
+    for (_, _, league_name), file_path in zip(tasks, file_paths):
         if file_path:
-            file_paths.append(file_path)
+            league_files[league_name].append(file_path)
 
-        # Concatenate all season files for the league and delete individual season CSVs
-        process_and_concatenate_league_data(file_paths, league_name, final_save_dir)
+    # Concatenate all season files for each league and delete individual season CSVs
+    for league_name, paths in league_files.items():
+        process_and_concatenate_league_data(paths, league_name, final_save_dir)
 
 if __name__ == "__main__":
     current_year = datetime.now().year
@@ -2,25 +2,31 @@ import joblib
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from src.utils import load_model  # Use the load_model from utils for consistency
 
-def evaluate_model(model_path, X_test, y_test):
+def evaluate_model(model_path, X_test, y_test, model_name=None):
     """
-    Evaluate the loaded model on the test data.
+    Evaluate a model on the test data.
 
     Args:
-        model_path (str): Path to the saved model file.
+        model_path (str or estimator): Path to the saved model file, or an already fitted model.
         X_test (pd.DataFrame): Test features.
         y_test (pd.Series): True labels for the test set.
+        model_name (str): Name shown in the report (defaults to the model path).
 
     Returns:
         tuple: (y_pred, y_test) - Predicted and actual labels.
     """
-    # Load the model from the provided path
-    model = load_model(model_path)
-    
-    # Check if the model was successfully loaded
-    if model is None:
-        print(f"Error: Model could not be loaded from {model_path}")
-        return None, None
+    if isinstance(model_path, str):
+        # Load the model from the provided path
+        model = load_model(model_path)
+
+        # Check if the model was successfully loaded
+        if model is None:
+            print(f"Error: Model could not be loaded from {model_path}")
+            return None, None
+    else:
+        # Already a fitted model, no need to round-trip through disk
+        model = model_path
+        model_path = model_name or model.__class__.__name__
 
     # Make predictions on the test set
     y_pred = model.predict(X_test)
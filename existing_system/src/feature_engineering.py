@@ -1,187 +1,459 @@
+import numpy as np
 import pandas as pd
 import logging
+from collections import defaultdict, deque
+from itertools import islice
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the kernels then run as plain Python loops
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 n = 3  # Number of previous matches to consider for rolling statistics
+MAX_WINDOW = 10  # Longest rolling window, i.e. the matches the incremental path keeps per team
 
-def calculate_wins_losses(row):
-    """Calculate win/loss from 'Result'."""
-    if row['Result'] == 'H':  # Home win
-        return 1, 0
-    elif row['Result'] == 'A':  # Away win
-        return 0, 1
-    else:  # Draw
-        return 0, 0
-
-def get_form_points(result):
-    """Calculate form points based on match results: W=3, D=1, L=0."""
-    if result == 'W':
-        return 3
-    elif result == 'D':
-        return 1
-    else:
-        return 0
-
-def calculate_streaks(df, team_col, result_col):
-    """Calculate winning/losing streaks for a team."""
-    streak = []
-    current_streak = 0
-    for result in df[result_col]:
-        if result == 'W':
-            current_streak += 1
-        elif result == 'L':
-            current_streak = -1 if current_streak >= 0 else current_streak - 1
-        else:
-            current_streak = 0
-        streak.append(current_streak)
-    return pd.Series(streak)
+# Form points earned from a full-time result, seen from the home and the away side: W=3, D=1, L=0
+HOME_POINTS = {'H': 3, 'D': 1, 'A': 0}
+AWAY_POINTS = {'A': 3, 'D': 1, 'H': 0}
 
-def apply_feature_engineering(df):
+@njit(parallel=True)
+def _group_streaks(outcomes, order, starts):
     """
-    Apply feature engineering to the dataset, handling both single-league and multi-league cases.
+    Winning/losing streaks over each group's chronological outcomes (1 = win, -1 = loss, 0 = draw).
+
+    A win extends a winning streak or starts a new one at 1, a loss likewise counts down from -1,
+    and a draw resets the streak to 0.
+    """
+    streaks = np.empty(outcomes.shape[0], dtype=np.int16)
+    for g in prange(starts.shape[0] - 1):
+        current_streak = 0
+        for j in range(starts[g], starts[g + 1]):
+            outcome = outcomes[order[j]]
+            if outcome == 1:
+                current_streak = current_streak + 1 if current_streak > 0 else 1
+            elif outcome == -1:
+                current_streak = current_streak - 1 if current_streak < 0 else -1
+            else:
+                current_streak = 0
+            streaks[order[j]] = current_streak
+    return streaks
+
+@njit(parallel=True)
+def _group_cumsum(values, order, starts):
+    """
+    Running sum and count of non-missing values of each column within each group.
+
+    `values` is (n_rows, n_columns); results are laid out in group order, i.e. row j of the
+    output belongs to row order[j] of the input. Rows of group g are order[starts[g]:starts[g + 1]].
     """
-    group_columns = ['Home Team', 'Away Team']
+    n_rows, n_columns = values.shape
+    sums = np.empty((n_rows, n_columns))
+    counts = np.empty((n_rows, n_columns))
+    for g in prange(starts.shape[0] - 1):
+        for c in range(n_columns):
+            total = 0.0
+            count = 0.0
+            for j in range(starts[g], starts[g + 1]):
+                value = values[order[j], c]
+                if not np.isnan(value):
+                    total += value
+                    count += 1
+                sums[j, c] = total
+                counts[j, c] = count
+    return sums, counts
+
+@njit(parallel=True)
+def _rolling_group_sum(cum_sums, cum_counts, order, starts, window):
+    """
+    Rolling sum and count over the last `window` rows of each group, as the difference of two
+    running totals from `_group_cumsum`. Results are scattered back to the original row order.
+    """
+    n_rows, n_columns = cum_sums.shape
+    sums = np.empty((n_rows, n_columns), dtype=np.float32)
+    counts = np.empty((n_rows, n_columns), dtype=np.float32)
+    for g in prange(starts.shape[0] - 1):
+        for j in range(starts[g], starts[g + 1]):
+            row = order[j]
+            lo = j - window
+            for c in range(n_columns):
+                total = cum_sums[j, c]
+                count = cum_counts[j, c]
+                if lo >= starts[g]:
+                    total -= cum_sums[lo, c]
+                    count -= cum_counts[lo, c]
+                sums[row, c] = total if count > 0 else np.nan
+                counts[row, c] = count
+    return sums, counts
+
+def team_ids(df):
+    """
+    Integer ids for the home and the away team of every row, from a single factorization
+    of the team names shared by both sides.
+
+    Team names are only unique within a league, so with a 'League' column the ids are per
+    (league, team) pair.
+
+    Returns:
+        tuple: (home_ids, away_ids) - dense integer ids aligned with the rows of df.
+    """
+    codes, _ = pd.factorize(pd.concat([df['Home Team'], df['Away Team']], ignore_index=True))
     if 'League' in df.columns:
-        group_columns = ['League', 'Home Team', 'Away Team']  # Adjust grouping for leagues
+        league_codes = pd.factorize(df['League'])[0]
+        codes = np.concatenate([league_codes, league_codes]) * (codes.max() + 1) + codes
+        codes = pd.factorize(codes)[0]
+    return codes[:len(df)], codes[len(df):]
+
+def group_index(codes):
+    """
+    Build the row ordering used by the rolling kernels for per-row integer group ids.
 
+    Returns:
+        tuple: (order, starts) - row positions sorted by group (stable, so rows keep
+        their current order within a group) and the offset where each group starts.
+    """
+    order = np.argsort(codes, kind='stable')
+    starts = np.searchsorted(codes[order], np.arange(codes.max() + 2 if len(codes) else 1))
+    return order, starts
+
+def group_cumsum(df, columns, index):
+    """Per-group running totals of the given columns, shared by every window size computed from them."""
+    values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    return _group_cumsum(values, index[0], index[1])
+
+def rolling_sum(cumulative, index, window):
+    """Rolling per-group sums (min_periods=1) as an (n_rows, n_columns) float32 array."""
+    return _rolling_group_sum(cumulative[0], cumulative[1], index[0], index[1], window)[0]
+
+def rolling_mean(cumulative, index, window):
+    """Rolling per-group means (min_periods=1) as an (n_rows, n_columns) float32 array."""
+    sums, counts = _rolling_group_sum(cumulative[0], cumulative[1], index[0], index[1], window)
+    return sums / counts
+
+def apply_feature_engineering(df):
+    """
+    Apply feature engineering to the dataset, handling both single-league and multi-league cases.
+    """
     # Sort by Season and Date to ensure chronological order
     if 'Season' in df.columns and 'Date' in df.columns:
         df = df.sort_values(by=['Season', 'Date'])
-        df['matchday'] = df.groupby('Season').cumcount() + 1
+        df['matchday'] = (df.groupby('Season').cumcount() + 1).astype(np.int32)
     else:
         df = df.sort_values(by=['Date'])
-        df['matchday'] = range(1, len(df) + 1)
+        df['matchday'] = np.arange(1, len(df) + 1, dtype=np.int32)
 
     # Apply only if 'Result', 'HG', 'AG' columns exist
     if 'Result' in df.columns and 'HG' in df.columns and 'AG' in df.columns:
-        df['home_win'], df['away_loss'] = zip(*df.apply(calculate_wins_losses, axis=1))
-        df['away_win'], df['home_loss'] = zip(*df.apply(lambda row: calculate_wins_losses(
-            {'Result': 'A' if row['Result'] == 'A' else 'H'}) if row['Result'] != 'D' else (0, 0), axis=1))
+        # Win/loss flags for both sides from two vectorized comparisons (draws are 0 everywhere)
+        results = df['Result'].to_numpy()
+        home_win = (results == 'H').astype(np.int8)
+        away_win = (results == 'A').astype(np.int8)
+        df['home_win'] = home_win
+        df['away_loss'] = home_win
+        df['away_win'] = away_win
+        df['home_loss'] = away_win
+
+        # Integer team ids, factorized once and used for every per-team feature instead of
+        # grouping on the team name strings
+        home_ids, away_ids = team_ids(df)
+
+        # Row orderings for the home and away side, shared by all rolling kernels
+        home_index = group_index(home_ids)
+        away_index = group_index(away_ids)
+
+        # Running totals per team; every window below is a difference of two of these
+        home_cumulative = group_cumsum(df, ['home_win', 'home_loss', 'HG', 'AG'], home_index)
+        away_cumulative = group_cumsum(df, ['away_win', 'away_loss', 'AG', 'HG'], away_index)
 
         # Rolling window for Home Team stats
-        df['HW'] = df.groupby(group_columns[:-1])['home_win'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
-        df['HL'] = df.groupby(group_columns[:-1])['home_loss'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
-        df['HGF'] = df.groupby(group_columns[:-1])['HG'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
-        df['HGA'] = df.groupby(group_columns[:-1])['AG'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
+        df[['HW', 'HL', 'HGF', 'HGA']] = rolling_sum(home_cumulative, home_index, n)
         df['HWGD'] = df['HGF'] - df['HGA']
         df['HLGD'] = df['HGA'] - df['HGF']
 
         # Rolling window for Away Team stats
-        df['AW'] = df.groupby(group_columns[1:])['away_win'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
-        df['AL'] = df.groupby(group_columns[1:])['away_loss'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
-        df['AGF'] = df.groupby(group_columns[1:])['AG'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
-        df['AGA'] = df.groupby(group_columns[1:])['HG'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
+        df[['AW', 'AL', 'AGF', 'AGA']] = rolling_sum(away_cumulative, away_index, n)
         df['AWGD'] = df['AGF'] - df['AGA']
         df['ALGD'] = df['AGA'] - df['AGF']
 
         # Rolling average goals
-        df['home_rolling_goals'] = df.groupby(group_columns[:-1])['HG'].rolling(5, min_periods=1).mean().reset_index(0, drop=True)
-        df['away_rolling_goals'] = df.groupby(group_columns[1:])['AG'].rolling(5, min_periods=1).mean().reset_index(0, drop=True)
-
-        # Historical Form Points Features
-        df['HM1_points'] = df.groupby(group_columns[:-1])['Result'].shift(1).fillna('D').apply(get_form_points)
-        df['HM2_points'] = df.groupby(group_columns[:-1])['Result'].shift(2).fillna('D').apply(get_form_points)
-        df['HM3_points'] = df.groupby(group_columns[:-1])['Result'].shift(3).fillna('D').apply(get_form_points)
-
-        df['AM1_points'] = df.groupby(group_columns[1:])['Result'].shift(1).fillna('D').apply(get_form_points)
-        df['AM2_points'] = df.groupby(group_columns[1:])['Result'].shift(2).fillna('D').apply(get_form_points)
-        df['AM3_points'] = df.groupby(group_columns[1:])['Result'].shift(3).fillna('D').apply(get_form_points)
-
-        # Win percentages
-        df['HW%'] = df['HW'] / (df['HW'] + df['HL'])
-        df['HL%'] = df['HL'] / (df['HW'] + df['HL'])
-        df['AW%'] = df['AW'] / (df['AW'] + df['AL'])
-        df['AL%'] = df['AL'] / (df['AW'] + df['AL'])
-
-        # Streaks
-        df['Home_Streak'] = df.groupby(group_columns[:-1])['Result'].apply(lambda x: calculate_streaks(df, 'Home Team', 'Result')).reset_index(drop=True)
-        df['Away_Streak'] = df.groupby(group_columns[1:])['Result'].apply(lambda x: calculate_streaks(df, 'Away Team', 'Result')).reset_index(drop=True)
+        df['home_rolling_goals'] = rolling_mean(home_cumulative, home_index, 5)[:, 2]
+        df['away_rolling_goals'] = rolling_mean(away_cumulative, away_index, 5)[:, 2]
+
+        # Historical Form Points Features (missing history counts as a draw); mapped from the plain
+        # result values, as a categorical Result would keep only the points that occur as categories
+        home_points = pd.Series(results, index=df.index).map(HOME_POINTS).groupby(home_ids)
+        away_points = pd.Series(results, index=df.index).map(AWAY_POINTS).groupby(away_ids)
+        for k in (1, 2, 3):
+            df[f'HM{k}_points'] = home_points.shift(k).fillna(1).astype(np.int8)
+        for k in (1, 2, 3):
+            df[f'AM{k}_points'] = away_points.shift(k).fillna(1).astype(np.int8)
+
+        # Win percentages (0 for teams without a decided match in the window)
+        for side in ('H', 'A'):
+            wins = df[f'{side}W'].to_numpy(dtype=np.float32)
+            losses = df[f'{side}L'].to_numpy(dtype=np.float32)
+            decided = wins + losses
+            df[f'{side}W%'] = np.divide(wins, decided, out=np.zeros_like(wins), where=decided != 0)
+            df[f'{side}L%'] = np.divide(losses, decided, out=np.zeros_like(losses), where=decided != 0)
+
+        # Streaks (outcomes from the home side; the away side sees the same results negated)
+        home_outcomes = (home_win - away_win).astype(np.int8)
+        df['Home_Streak'] = _group_streaks(home_outcomes, *home_index)
+        df['Away_Streak'] = _group_streaks(-home_outcomes, *away_index)
 
         # Contextual Factors
-        df['Matchday_Importance'] = df['matchday'].apply(lambda x: 1 if x >= 35 else 0)
+        df['Matchday_Importance'] = (df['matchday'].to_numpy() >= 35).astype(np.int8)
 
         # Short-term and long-term form
-        df['HGF_3'] = df.groupby(group_columns[:-1])['HG'].rolling(3, min_periods=1).sum().reset_index(0, drop=True)
-        df['HGF_10'] = df.groupby(group_columns[:-1])['HG'].rolling(10, min_periods=1).sum().reset_index(0, drop=True)
-        df['AGF_3'] = df.groupby(group_columns[1:])['AG'].rolling(3, min_periods=1).sum().reset_index(0, drop=True)
-        df['AGF_10'] = df.groupby(group_columns[1:])['AG'].rolling(10, min_periods=1).sum().reset_index(0, drop=True)
+        df['HGF_3'] = rolling_sum(home_cumulative, home_index, 3)[:, 2]
+        df['HGF_10'] = rolling_sum(home_cumulative, home_index, 10)[:, 2]
+        df['AGF_3'] = rolling_sum(away_cumulative, away_index, 3)[:, 2]
+        df['AGF_10'] = rolling_sum(away_cumulative, away_index, 10)[:, 2]
+
+        # Win/loss counts over the window are small integers; the remaining features are already
+        # float32 (goal sums can be missing for fixtures without goals) or int8/int16
+        df = df.astype({col: np.int8 for col in ('HW', 'HL', 'AW', 'AL')})
     else:
         logger.info("Skipping goal-based features since future fixtures do not have goal data.")
     
     return df
 
+def _window(buffer, field, window):
+    """Sum and count of the non-missing `field` values among the last `window` entries of a team buffer."""
+    values = [entry[field] for entry in islice(buffer, max(len(buffer) - window, 0), None) if not np.isnan(entry[field])]
+    return (sum(values) if values else np.nan), len(values)
+
+def _update_streak(streak, win, loss):
+    """Extend a winning/losing streak with one result, as in _group_streaks."""
+    if win:
+        return streak + 1 if streak > 0 else 1
+    if loss:
+        return streak - 1 if streak < 0 else -1
+    return 0
+
+def _update_team_state(cache, home_key, away_key, season, result, home_goals, away_goals):
+    """
+    Add one match to the cached per-team state: the windows of both teams, their streaks and
+    the season's matchday counter. Works on plain values only, so replaying the history needs
+    no per-match DataFrame or feature dict.
+
+    Returns:
+        int: The matchday of the match within its season.
+    """
+    home_win = int(result == 'H')
+    away_win = int(result == 'A')
+
+    # Entries: (goals for, goals against, win, loss, form points)
+    cache['home'][home_key].append((home_goals, away_goals, home_win, away_win, HOME_POINTS.get(result, 1)))
+    cache['away'][away_key].append((away_goals, home_goals, away_win, home_win, AWAY_POINTS.get(result, 1)))
+    cache['home_streak'][home_key] = _update_streak(cache['home_streak'][home_key], home_win, away_win)
+    cache['away_streak'][away_key] = _update_streak(cache['away_streak'][away_key], away_win, home_win)
+    cache['matchday'][season] += 1
+    return cache['matchday'][season]
+
+def _goals(value):
+    """Goals as a float, NaN when the match has not been played."""
+    return np.nan if pd.isna(value) else float(value)
+
+def fit_features(df_history):
+    """
+    Walk the history once and cache the per-team state needed to engineer new matches.
+
+    Args:
+        df_history (pd.DataFrame): Historical matches with 'Result', 'HG' and 'AG'.
+
+    Returns:
+        dict: Feature cache for `transform_feature`, holding the last MAX_WINDOW matches of
+        every team on each side, the current streaks and the matchday counters.
+    """
+    league = ['League'] if 'League' in df_history.columns else []
+    cache = {
+        'home_keys': league + ['Home Team'],
+        'away_keys': league + ['Away Team'],
+        'home': defaultdict(lambda: deque(maxlen=MAX_WINDOW)),
+        'away': defaultdict(lambda: deque(maxlen=MAX_WINDOW)),
+        'home_streak': defaultdict(int),
+        'away_streak': defaultdict(int),
+        'matchday': defaultdict(int),
+    }
+
+    # Same chronological order as apply_feature_engineering
+    sort_columns = ['Season', 'Date'] if 'Season' in df_history.columns else ['Date']
+    df_history = df_history.sort_values(by=sort_columns)
+    n_rows = len(df_history)
+    home_keys = zip(*(df_history[col].to_numpy() for col in cache['home_keys']))
+    away_keys = zip(*(df_history[col].to_numpy() for col in cache['away_keys']))
+    seasons = df_history['Season'].to_numpy() if 'Season' in df_history.columns else [None] * n_rows
+    home_goals = df_history['HG'].to_numpy(dtype=np.float64, na_value=np.nan).tolist()
+    away_goals = df_history['AG'].to_numpy(dtype=np.float64, na_value=np.nan).tolist()
+    for state in zip(home_keys, away_keys, seasons, df_history['Result'].to_numpy(), home_goals, away_goals):
+        _update_team_state(cache, *state)
+    return cache
+
+def transform_feature(match, cache):
+    """
+    Engineer the feature row for one match from the cached team state, then add the match to it.
+
+    Produces the same features as apply_feature_engineering for a match appended to the history,
+    at O(MAX_WINDOW) cost. A match without a result (a future fixture) leaves the form of both
+    teams unchanged apart from taking up a slot in their windows, exactly as in the batch path.
+
+    Args:
+        match (dict): Match details ('Home Team', 'Away Team', 'Date', optionally 'Season',
+            'League', 'HG', 'AG', 'Result').
+        cache (dict): Feature cache from `fit_features`; updated in place.
+
+    Returns:
+        pd.DataFrame: Single-row DataFrame with the engineered features.
+    """
+    home_key = tuple(match[col] for col in cache['home_keys'])
+    away_key = tuple(match[col] for col in cache['away_keys'])
+    result = match.get('Result')
+
+    # Rolling windows include the current match, so it enters the team state first
+    matchday = _update_team_state(cache, home_key, away_key, match.get('Season'), result,
+                                  _goals(match.get('HG')), _goals(match.get('AG')))
+    home = cache['home'][home_key]
+    away = cache['away'][away_key]
+    home_win = int(result == 'H')
+    away_win = int(result == 'A')
+
+    features = dict(match)
+    features['matchday'] = matchday
+    features.update(home_win=home_win, away_loss=home_win, away_win=away_win, home_loss=away_win)
+
+    for side, buffer in (('H', home), ('A', away)):
+        wins = _window(buffer, 2, n)[0]
+        losses = _window(buffer, 3, n)[0]
+        goals_for = _window(buffer, 0, n)[0]
+        goals_against = _window(buffer, 1, n)[0]
+        features.update({
+            f'{side}W': wins, f'{side}L': losses, f'{side}GF': goals_for, f'{side}GA': goals_against,
+            f'{side}WGD': goals_for - goals_against, f'{side}LGD': goals_against - goals_for,
+        })
+
+    for name, buffer in (('home_rolling_goals', home), ('away_rolling_goals', away)):
+        total, count = _window(buffer, 0, 5)
+        features[name] = total / count if count else np.nan
+
+    # Form points of the previous matches (missing history counts as a draw)
+    for prefix, buffer in (('HM', home), ('AM', away)):
+        for k in (1, 2, 3):
+            features[f'{prefix}{k}_points'] = buffer[-1 - k][4] if len(buffer) > k else 1
+
+    for side in ('H', 'A'):
+        decided = features[f'{side}W'] + features[f'{side}L']
+        features[f'{side}W%'] = features[f'{side}W'] / decided if decided else 0.0
+        features[f'{side}L%'] = features[f'{side}L'] / decided if decided else 0.0
+
+    features['Home_Streak'] = cache['home_streak'][home_key]
+    features['Away_Streak'] = cache['away_streak'][away_key]
+
+    features['Matchday_Importance'] = 1 if features['matchday'] >= 35 else 0
+
+    for prefix, buffer in (('HGF', home), ('AGF', away)):
+        for window in (3, 10):
+            features[f'{prefix}_{window}'] = _window(buffer, 0, window)[0]
+
+    return pd.DataFrame([features])
+
+@njit
+def _elo_loop(home_ids, away_ids, home_goals, away_goals, offensive, defensive, k, home_advantage):
+    """
+    Sequentially update offensive/defensive ratings match by match.
+
+    Returns an (n_matches, 4) array of the post-match home offensive, home defensive,
+    away offensive and away defensive ratings. `offensive`/`defensive` are updated in place.
+    """
+    elo = np.empty((home_ids.shape[0], 4))
+    for i in range(home_ids.shape[0]):
+        home = home_ids[i]
+        away = away_ids[i]
+        home_off = offensive[home]
+        home_def = defensive[home]
+        away_off = offensive[away]
+        away_def = defensive[away]
+
+        expected_home_goals = (home_off / (away_def + home_advantage)) * 1.5
+        expected_away_goals = (away_off / home_def) * 1.5
+
+        offensive[home] = home_off + k * (home_goals[i] - expected_home_goals)
+        defensive[home] = home_def + k * (expected_away_goals - away_goals[i])
+        offensive[away] = away_off + k * (away_goals[i] - expected_away_goals)
+        defensive[away] = away_def + k * (expected_home_goals - home_goals[i])
+
+        elo[i, 0] = offensive[home]
+        elo[i, 1] = defensive[home]
+        elo[i, 2] = offensive[away]
+        elo[i, 3] = defensive[away]
+    return elo
+
 def calculate_elo_ratings(df, k=20, home_advantage=100):
     """
     Adjust SPI-like (Elo) ratings dynamically based on match results.
+
+    Offensive and defensive ratings are held in two float64 arrays indexed by integer team id.
     
     Args:
         df (pd.DataFrame): Input DataFrame.
         k (int): K-factor for Elo rating adjustment.
         home_advantage (int): Points added to the home team rating to account for home-field advantage.
+
+    Returns:
+        pd.DataFrame: DataFrame with the post-match offensive/defensive ratings of both teams.
     """
     if 'HG' not in df.columns or 'AG' not in df.columns:
         logger.warning("Skipping Elo rating calculation because 'HG' or 'AG' columns are missing.")
         return df
 
-    teams = pd.concat([df['Home Team'], df['Away Team']]).unique()
-    ratings = {team: {'offensive': 1500, 'defensive': 1500} for team in teams}
-
-    def update_ratings(home_off, home_def, away_off, away_def, home_goals, away_goals, k, home_advantage):
-        expected_home_goals = (home_off / (away_def + home_advantage)) * 1.5
-        expected_away_goals = (away_off / home_def) * 1.5
-
-        new_home_off = home_off + k * (home_goals - expected_home_goals)
-        new_away_off = away_off + k * (away_goals - expected_away_goals)
-
-        new_home_def = home_def + k * (expected_away_goals - away_goals)
-        new_away_def = away_def + k * (expected_home_goals - home_goals)
-
-        return new_home_off, new_home_def, new_away_off, new_away_def
-
-    for index, row in df.iterrows():
-        home_team = row['Home Team']
-        away_team = row['Away Team']
-        home_goals = row['HG']
-        away_goals = row['AG']
-
-        home_off = ratings[home_team]['offensive']
-        home_def = ratings[home_team]['defensive']
-        away_off = ratings[away_team]['offensive']
-        away_def = ratings[away_team]['defensive']
+    # Integer team IDs shared by both columns, so ratings can live in arrays indexed by team
+    team_ids, teams = pd.factorize(pd.concat([df['Home Team'], df['Away Team']], ignore_index=True))
+    home_ids = team_ids[:len(df)]
+    away_ids = team_ids[len(df):]
 
-        new_home_off, new_home_def, new_away_off, new_away_def = update_ratings(
-            home_off, home_def, away_off, away_def, home_goals, away_goals, k, home_advantage
-        )
+    offensive = np.full(len(teams), 1500.0)
+    defensive = np.full(len(teams), 1500.0)
 
-        ratings[home_team]['offensive'], ratings[home_team]['defensive'] = new_home_off, new_home_def
-        ratings[away_team]['offensive'], ratings[away_team]['defensive'] = new_away_off, new_away_def
+    elo = _elo_loop(
+        home_ids, away_ids,
+        df['HG'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df['AG'].to_numpy(dtype=np.float64, na_value=np.nan),
+        offensive, defensive, float(k), float(home_advantage)
+    )
 
-        df.loc[index, 'Home_Offensive_Elo'] = new_home_off
-        df.loc[index, 'Home_Defensive_Elo'] = new_home_def
-        df.loc[index, 'Away_Offensive_Elo'] = new_away_off
-        df.loc[index, 'Away_Defensive_Elo'] = new_away_def
+    # Ratings are accumulated in float64 and stored as float32 features
+    df[['Home_Offensive_Elo', 'Home_Defensive_Elo', 'Away_Offensive_Elo', 'Away_Defensive_Elo']] = elo.astype(np.float32)
 
     return df
 
 
-def generate_features(df, is_future=False):
+def generate_features(df, is_future=False, sparse_columns=None):
     """
     Generate features for both historical and future fixtures.
     
     Args:
         df (pd.DataFrame): Input DataFrame with match data.
         is_future (bool): If True, the data is for future fixtures without goal data.
+        sparse_columns (list, optional): Columns known to be sparse. Detected from the dtypes
+            when not given; pass an empty list to skip the check.
     
     Returns:
         pd.DataFrame: DataFrame with engineered features.
     """
-    # Handle sparse data - Convert to dense if any columns are sparse
-    if any(pd.api.types.is_sparse(dtype) for dtype in df.dtypes):
-        df = df.sparse.to_dense()
-        logger.info("Converted sparse DataFrame to dense format.")
+    # Handle sparse data - Convert only the sparse columns to dense
+    if sparse_columns is None:
+        sparse_columns = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+    if sparse_columns:
+        df[sparse_columns] = df[sparse_columns].sparse.to_dense()
+        logger.info(f"Converted sparse columns to dense format: {sparse_columns}")
 
     if is_future:
         logger.info("Skipping goal-based feature engineering for future fixtures...")
@@ -1,4 +1,5 @@
 import joblib
+from functools import lru_cache
 from sklearn.ensemble import StackingClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
 
@@ -65,9 +66,11 @@ def train_and_evaluate_ensemble(ensemble_model, X_train, X_test, y_train, y_test
 # --------------------------------------------------------------
 # 4. Load Saved Models
 # --------------------------------------------------------------
+@lru_cache(maxsize=None)
 def load_models():
     """
     Load trained models from pickle files (Logistic Regression, Random Forest, XGBoost).
+    The models are unpickled once and the same dictionary is returned on later calls.
     Returns:
         dict: A dictionary of loaded models.
     """
@@ -1,13 +1,35 @@
 # predict.py
 import joblib
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from data_loader import load_and_preprocess_data  # Load data loading function
-from feature_engineering import apply_feature_engineering  # Load feature engineering function
+from feature_engineering import apply_feature_engineering, MAX_WINDOW  # Load feature engineering function
 
+@lru_cache(maxsize=None)
 def load_model(model_path):
-    """Load the trained model from a .pkl file."""
+    """Load the trained model from a .pkl file (cached per path, so repeated predictions skip unpickling)."""
     return joblib.load(model_path)
 
+# Model class index to readable result (H=0, D=1, A=2)
+RESULT_MAPPING = {0: 'Home Win', 1: 'Draw', 2: 'Away Win'}
+
+def make_predictions(model, match_data):
+    """
+    Make predictions for a batch of matches with a single model call.
+
+    Args:
+        model: The trained machine learning model (e.g., Random Forest, XGBoost)
+        match_data: Processed feature data, one row per match to predict
+
+    Returns:
+        List of prediction results (e.g., Home win, Draw, Away win), one per row
+    """
+    # One predict_proba call over the whole batch amortizes the per-call overhead of the ensembles
+    probabilities = model.predict_proba(match_data)
+    predictions = model.classes_[np.argmax(probabilities, axis=1)]
+    return [RESULT_MAPPING[prediction] for prediction in predictions]
+
 def make_prediction(model, match_data):
     """
     Make predictions using the trained model.
@@ -19,34 +41,66 @@ def make_prediction(model, match_data):
     Returns:
         Prediction result (e.g., Home win, Draw, Away win)
     """
-    # Model expects a 2D array, even for a single sample
-    prediction = model.predict(match_data)
-    
-    # You may need to map numeric prediction back to the original result (e.g., H=0, D=1, A=2)
-    result_mapping = {0: 'Home Win', 1: 'Draw', 2: 'Away Win'}
-    return result_mapping[prediction[0]]
+    return make_predictions(model, match_data)[0]
+
+def process_matches_for_prediction(df, match_infos, window=MAX_WINDOW):
+    """
+    Process several matches for prediction with one feature engineering pass.
+
+    Only each home team's last `window` home matches and each away team's last `window` away
+    matches feed the new rows' rolling features, so just those rows are re-engineered instead
+    of the whole history. Streaks are therefore capped at `window` matches.
+
+    Args:
+        df: DataFrame with the historical data, in chronological order
+        match_infos: List of dictionaries containing match details (teams, date, odds, etc.)
+        window: Number of past matches kept per team
+
+    Returns:
+        match_data: Processed features, one row per match in the order given
+    """
+    new_matches = pd.DataFrame(match_infos)
+    home_rows = df['Home Team'].isin(new_matches['Home Team'])
+    away_rows = df['Away Team'].isin(new_matches['Away Team'])
+    home_history = df[home_rows].groupby('Home Team', observed=True).tail(window).index
+    away_history = df[away_rows].groupby('Away Team', observed=True).tail(window).index
+    df_tail = df.loc[home_history.union(away_history)]
+
+    # Add the new matches to the recent history for feature engineering
+    if 'Date' in new_matches.columns:
+        new_matches['Date'] = pd.to_datetime(new_matches['Date'])
+    df_tail = pd.concat([df_tail, new_matches], ignore_index=True)
+    new_rows = df_tail.index[-len(new_matches):]
+
+    # Apply the same feature engineering used during training
+    df_tail = apply_feature_engineering(df_tail)
+
+    # Extract features for the new matches (sorting keeps their index labels)
+    match_data = df_tail.loc[new_rows].drop(columns=['Result', 'Date', 'Season'])  # Drop unnecessary columns
+
+    # The matchday counts every match of the season, not just the rows kept above
+    if 'Season' in df.columns:
+        matchday = new_matches['Season'].map(df['Season'].value_counts()).fillna(0).astype(int).to_numpy() + 1
+    else:
+        matchday = len(df) + 1
+    match_data['matchday'] = matchday
+    match_data['Matchday_Importance'] = (match_data['matchday'] >= 35).astype(int)
 
-def process_match_for_prediction(df, match_info):
+    return match_data
+
+def process_match_for_prediction(df, match_info, window=MAX_WINDOW):
     """
     Process a single match for prediction by applying feature engineering steps.
-    
+
     Args:
-        df: DataFrame with the historical data
+        df: DataFrame with the historical data, in chronological order
         match_info: Dictionary containing match details (teams, date, odds, etc.)
-        
+        window: Number of past matches kept per team
+
     Returns:
         match_data: Processed features for the match
     """
-    # Add new match info to historical data for feature engineering
-    df = df.append(match_info, ignore_index=True)
-    
-    # Apply the same feature engineering used during training
-    df = apply_feature_engineering(df)
-    
-    # Extract features for the new match (last row in DataFrame)
-    match_data = df.iloc[[-1]].drop(columns=['Result', 'Date', 'Season'])  # Drop unnecessary columns
-    
-    return match_data
+    return process_matches_for_prediction(df, [match_info], window)
 
 def predict_next_match(model_path, historical_data_path, new_match_info):
     """
@@ -74,6 +128,25 @@ def predict_next_match(model_path, historical_data_path, new_match_info):
     
     return result
 
+def predict_next_matches(model_path, historical_data_path, new_match_infos):
+    """
+    Make predictions for several upcoming matches at once.
+
+    Args:
+        model_path: Path to the trained model (.pkl file)
+        historical_data_path: Path to the CSV file with historical match data
+        new_match_infos: List of dictionaries with details of the new matches to predict
+
+    Returns:
+        List of prediction results (Home Win, Draw, Away Win), one per match
+    """
+    historical_data = load_and_preprocess_data(historical_data_path)
+    model = load_model(model_path)
+
+    # Engineer features and predict for the whole batch in one pass each
+    match_data = process_matches_for_prediction(historical_data, new_match_infos)
+    return make_predictions(model, match_data)
+
 # Example usage
 if __name__ == "__main__":
     model_path = "models/Random_Forest.pkl"
@@ -1,14 +1,38 @@
 import os
-import joblib  # For saving models
 import pandas as pd
+from joblib import Memory, Parallel, delayed
+from threadpoolctl import threadpool_limits
 from imblearn.combine import SMOTETomek  # Import SMOTETomek for balancing data
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.model_selection import train_test_split, GridSearchCV
+from imblearn.pipeline import Pipeline
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingRandomSearchCV)
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingRandomSearchCV
+from scipy.stats import randint
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
+import xgboost
 from xgboost import XGBClassifier
 from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.utils.class_weight import compute_sample_weight
 import numpy as np
+from src.utils import save_models
+
+# On-disk cache for fitted pipeline preprocessing steps, shared by all candidates of a search
+CV_CACHE_DIR = '.cv_cache'
+
+# Match outcomes in class-index order (Result_Numeric H=0, D=1, A=2)
+RESULT_CLASSES = ['H', 'D', 'A']
+
+# Models whose features are standardized inside their pipeline (the tree models don't need it)
+SCALED_MODELS = {'Logistic_Regression'}
+
+# Models balanced with SMOTETomek inside their pipeline; the tree models are class-weighted instead,
+# which avoids SMOTE's nearest-neighbour search
+RESAMPLED_MODELS = {'Logistic_Regression'}
+
+# Training rows each random-search candidate is first cross-validated on, before successive halving
+HALVING_MIN_RESOURCES = 500
 
 # --------------------------------------------------------------
 # 1. Handle Sparse Data
@@ -32,27 +56,38 @@ def handle_sparse_data(X_train, X_test):
 # --------------------------------------------------------------
 # 2. Target Encoding
 # --------------------------------------------------------------
+def encode_results(results):
+    # Index positions give H=0, D=1, A=2, TBD=3 and -1 for anything else in one vectorized pass;
+    # returns the int8 class codes (-1 for TBD too) and the mask of future 'TBD' fixtures
+    codes = pd.Index(RESULT_CLASSES + ['TBD']).get_indexer(results)
+    return np.where(codes < len(RESULT_CLASSES), codes, -1).astype(np.int8), codes == len(RESULT_CLASSES)
+
 def encode_target(df):
-    df['Result_Numeric'] = df['Result'].map({'H': 0, 'D': 1, 'A': 2})
+    df['Result_Numeric'] = encode_results(df['Result'])[0]
     return df
 
 # --------------------------------------------------------------
 # 3. Label Encoding for Team Names
 # --------------------------------------------------------------
 def encode_teams(df):
-    label_encoder = LabelEncoder()
-    df['Home Team'] = label_encoder.fit_transform(df['Home Team'])
-    df['Away Team'] = label_encoder.transform(df['Away Team'])
+    # One code per team across both columns, so away-only teams are encoded too
+    codes, _ = pd.factorize(pd.concat([df['Home Team'], df['Away Team']], ignore_index=True))
+    df['Home Team'] = codes[:len(df)].astype(np.int32)
+    df['Away Team'] = codes[len(df):].astype(np.int32)
     return df
 
 # --------------------------------------------------------------
 # 4. Date Feature Transformation
 # --------------------------------------------------------------
 def transform_dates(df):
-    df['days_since_reference'] = (df['Date'] - pd.Timestamp('1970-01-01')).dt.days
+    # Days since the epoch straight from the datetime64 values, stored as int32
+    df['days_since_reference'] = transform_dates_to_days(df['Date'])
     df = df.drop(columns=['Date'])
     return df
 
+def transform_dates_to_days(dates):
+    return dates.to_numpy(dtype='datetime64[D]').astype(np.int32)
+
 # --------------------------------------------------------------
 # 5. Feature Selection: Dropping Redundant Features
 # --------------------------------------------------------------
@@ -60,6 +95,10 @@ def select_features(df):
     drop_columns = ['HG', 'AG', 'home_win', 'away_loss', 'away_win', 'home_loss', 'Result', 'Result_Numeric']
     return df.drop(columns=drop_columns)
 
+def downcast_features(df):
+    # float32 halves the memory traffic of scaling, SMOTE's neighbour search and tree fitting
+    return df.astype({col: np.float32 for col in df.select_dtypes(include='float64').columns})
+
 # --------------------------------------------------------------
 # 6. Train-Test Split
 # --------------------------------------------------------------
@@ -72,8 +111,11 @@ def split_data(df_clean, df):
 # 7. Feature Scaling (StandardScaler)
 # --------------------------------------------------------------
 def scale_features(X_train, X_test):
-    scaler = StandardScaler()
-    return scaler.fit_transform(X_train), scaler.transform(X_test), scaler
+    # Scale in place on float32 copies of the split, rather than allocating another N x F array
+    scaler = StandardScaler(copy=False)
+    X_train_scaled = scaler.fit_transform(np.ascontiguousarray(X_train, dtype=np.float32))
+    X_test_scaled = scaler.transform(np.ascontiguousarray(X_test, dtype=np.float32))
+    return X_train_scaled, X_test_scaled, scaler
 
 # --------------------------------------------------------------
 # 8. Handling Class Imbalance with SMOTETomek
@@ -83,81 +125,239 @@ def apply_smote_tomek(X_train, y_train):
     return smt.fit_resample(X_train, y_train)
 
 # --------------------------------------------------------------
-# 9. Hyperparameter Tuning Function (with GridSearchCV)
+# 9. Hyperparameter Tuning Function (with successive halving)
 # --------------------------------------------------------------
-def hyperparameter_tuning(model, param_grid, X_train, y_train):
-    grid_search = GridSearchCV(model, param_grid, cv=5, scoring='f1_macro', n_jobs=-1)
-    grid_search.fit(X_train, y_train)
-    return grid_search.best_estimator_
+def search_fit_params(sample_weight=None, eval_set=None, prefix=''):
+    """Keyword arguments passed through a search to every fit (`prefix` routes them to a pipeline step)."""
+    fit_params = {} if sample_weight is None else {'sample_weight': sample_weight}
+    if eval_set is not None:
+        # Early-stopping validation data
+        fit_params.update(eval_set=eval_set, verbose=False)
+    return {f'{prefix}{key}': value for key, value in fit_params.items()}
+
+def build_pipeline(name, model, random_state=42):
+    """
+    Wrap a model with its preprocessing so it is fitted inside every CV fold.
+
+    Scaling (for SCALED_MODELS) and SMOTETomek (for RESAMPLED_MODELS) are then fitted on the
+    training folds only, and their fitted state is cached in CV_CACHE_DIR so candidates sharing
+    a fold reuse it.
+    """
+    steps = [('scaler', StandardScaler())] if name in SCALED_MODELS else []
+    if name in RESAMPLED_MODELS:
+        steps.append(('smt', SMOTETomek(random_state=random_state)))
+    steps.append(('clf', model))
+    return Pipeline(steps, memory=Memory(CV_CACHE_DIR, verbose=0))
+
+def final_estimator(model):
+    """The classifier itself, for a bare model or a preprocessing pipeline."""
+    return model[-1] if isinstance(model, Pipeline) else model
+
+def hyperparameter_tuning(model, param_dist, X_train, y_train, sample_weight=None, n_jobs=-1, n_iter=30, random_state=42,
+                          eval_set=None, prefix=''):
+    """
+    Randomly search a model with successive halving.
+
+    All n_iter candidates are first cross-validated on a small stratified subsample; only the best
+    third of them is promoted to a three times larger one, until the survivors see the full data.
+    """
+    fit_params = search_fit_params(sample_weight, eval_set, prefix)
+    random_search = HalvingRandomSearchCV(model, param_dist, n_candidates=n_iter, factor=3, resource='n_samples',
+                                          min_resources=min(HALVING_MIN_RESOURCES, len(y_train)), cv=5,
+                                          scoring='f1_macro', n_jobs=n_jobs, random_state=random_state)
+    random_search.fit(X_train, y_train, **fit_params)
+    return random_search.best_estimator_
+
+def pairwise_tune(model, stages, X_train, y_train, sample_weight=None, n_jobs=-1, eval_set=None, prefix=''):
+    """
+    Tune a model greedily, one small grid of (usually two) related parameters at a time.
+
+    Each stage is grid-searched with the best values of the earlier stages fixed, so the number
+    of candidates grows with the sum rather than the product of the grid sizes.
+
+    Args:
+        model: Estimator to tune.
+        stages (list): Parameter grids searched in order.
+
+    Returns:
+        The estimator with the best parameters of every stage, fitted once on the training data.
+    """
+    fit_params = search_fit_params(sample_weight, eval_set, prefix)
+    for grid in stages:
+        # Only the best parameters are carried forward, so no stage refits its winner
+        grid_search = GridSearchCV(model, grid, cv=5, scoring='f1_macro', n_jobs=n_jobs, refit=False)
+        grid_search.fit(X_train, y_train, **fit_params)
+        print(f"Best {', '.join(grid)}: {grid_search.best_params_}")
+        model = clone(model).set_params(**grid_search.best_params_)
+    # Single final fit, early-stopped on the same held-out eval_set
+    return model.fit(X_train, y_train, **fit_params)
+
+def fit_model(name, model, param_dist, X_train, y_train, sample_weight, n_jobs, random_state=42, eval_set=None):
+    """Fit one base model, randomly searching it when a parameter distribution is given, within n_jobs cores."""
+    # Parameters and fit arguments of a pipeline belong to its 'clf' step
+    prefix = 'clf__' if isinstance(model, Pipeline) else ''
+    if prefix and param_dist is not None:
+        if isinstance(param_dist, list):
+            param_dist = [{prefix + key: values for key, values in grid.items()} for grid in param_dist]
+        else:
+            param_dist = {prefix + key: values for key, values in param_dist.items()}
+
+    with threadpool_limits(limits=n_jobs):
+        if param_dist is None:
+            return name, model.fit(X_train, y_train, **search_fit_params(sample_weight, prefix=prefix))
+
+        print(f"\nHyperparameter tuning for {name.replace('_', ' ')}...")
+        if isinstance(param_dist, list):
+            best_model = pairwise_tune(model, param_dist, X_train, y_train, sample_weight,
+                                       n_jobs=n_jobs, eval_set=eval_set, prefix=prefix)
+        else:
+            best_model = hyperparameter_tuning(model, param_dist, X_train, y_train, sample_weight,
+                                               n_jobs=n_jobs, random_state=random_state, eval_set=eval_set,
+                                               prefix=prefix)
+
+    # Freeze the number of rounds early stopping picked, so the model can be refit (e.g. inside
+    # the ensemble) without a validation set
+    if eval_set is not None:
+        booster = final_estimator(best_model)
+        booster.set_params(n_estimators=booster.best_iteration + 1, early_stopping_rounds=None)
+    return name, best_model
+
+def xgb_device_params(device):
+    """XGBClassifier arguments selecting CPU or GPU histogram training ('device' exists from XGBoost 2.0)."""
+    if device != 'cuda':
+        return {'tree_method': 'hist'}
+    if int(xgboost.__version__.split('.')[0]) >= 2:
+        return {'tree_method': 'hist', 'device': 'cuda'}
+    return {'tree_method': 'gpu_hist'}
+
+def hold_out_eval_set(X_train, y_train, sample_weight, random_state, test_size=0.1):
+    """
+    Split a stratified validation slice off the training data for early stopping.
+
+    Returns:
+        tuple: (X_fit, y_fit, sample_weight_fit, eval_set) - the remaining training data and
+        the [(X_val, y_val)] list expected by XGBoost's eval_set.
+    """
+    fit_idx, val_idx = train_test_split(np.arange(len(y_train)), test_size=test_size,
+                                        random_state=random_state, stratify=y_train)
+
+    def take(data, idx):
+        return data.iloc[idx] if hasattr(data, 'iloc') else data[idx]
+
+    weights = None if sample_weight is None else take(sample_weight, fit_idx)
+    return take(X_train, fit_idx), take(y_train, fit_idx), weights, [(take(X_train, val_idx), take(y_train, val_idx))]
 
 # --------------------------------------------------------------
 # 10. Train Multiple Classifiers with Hyperparameter Tuning
 # --------------------------------------------------------------
-def train_models(X_train_smote, y_train_smote, config):
+def train_models(X_train_smote, y_train_smote, config, sample_weight=None, preprocess=False):
+    """
+    Tune and fit the base models.
+
+    Args:
+        X_train_smote, y_train_smote: Training data, already scaled/resampled unless `preprocess`.
+        config (dict): Project configuration.
+        sample_weight (array-like, optional): Per-sample weights for cost-sensitive training.
+        preprocess (bool): Fit scaling and SMOTETomek inside each model's pipeline, per CV fold,
+            instead of expecting preprocessed data. The tree models are class-weighted rather
+            than resampled.
+
+    Returns:
+        dict: Fitted models (pipelines when `preprocess`) keyed by name.
+    """
+    if preprocess and sample_weight is not None:
+        raise ValueError("sample_weight cannot be combined with in-pipeline SMOTETomek resampling.")
+
     log_reg_params = config['model_training']['models']['Logistic_Regression']
     rf_params = config['model_training']['models']['Random_Forest']
     xgb_params = config['model_training']['models']['XGBoost']
 
+    xgb_device = xgb_params.get('device', 'cpu')
+
     models = {
         'Logistic_Regression': LogisticRegression(),
         'Random_Forest': RandomForestClassifier(random_state=config['project']['random_state']),
-        'XGBoost': XGBClassifier(random_state=config['project']['random_state'])
+        # Histogram split finding, and early stopping instead of searching over the number of rounds
+        'XGBoost': XGBClassifier(n_estimators=1000, early_stopping_rounds=30, eval_metric='mlogloss',
+                                 random_state=config['project']['random_state'], **xgb_device_params(xgb_device))
     }
 
-    param_grids = {
+    # Random Forest: 30 sampled candidates, successively halved, instead of the full grid
+    param_dists = {
         'Random_Forest': {
-            'n_estimators': [100, 200, 300],
-            'max_depth': [10, 20, 30],
-            'min_samples_split': [2, 5, 10]
+            'n_estimators': randint(100, 400),
+            'max_depth': randint(5, 35),
+            'min_samples_split': randint(2, 15),
+            'min_samples_leaf': randint(1, 10),
+            'max_features': ['sqrt', 'log2']
         },
-        'XGBoost': {
-            'n_estimators': [100, 200, 300],
-            'max_depth': [3, 6, 9],
-            'learning_rate': [0.01, 0.1, 0.2]
-        }
+        # XGBoost is tuned in stages (a list of grids, see pairwise_tune); early stopping sets the rounds
+        'XGBoost': [
+            {'learning_rate': [0.01, 0.05, 0.1, 0.2]},
+            {'max_depth': [3, 5, 7, 9], 'min_child_weight': [1, 3, 5]},
+            {'subsample': [0.6, 0.8, 1.0], 'colsample_bytree': [0.6, 0.8, 1.0]},
+            {'gamma': [0, 0.1, 1, 5]}
+        ]
     }
 
+    # Balanced sample weights already correct for class imbalance, so don't apply class_weight on top
+    # saga handles the elastic-net penalty and, with a looser tol, converges in far fewer epochs than lbfgs
     models['Logistic_Regression'] = LogisticRegression(
         max_iter=log_reg_params['max_iter'],
-        class_weight=log_reg_params['class_weight'],
-        solver=log_reg_params['solver']
-    ).fit(X_train_smote, y_train_smote)
+        class_weight=log_reg_params['class_weight'] if sample_weight is None else None,
+        solver=log_reg_params.get('solver', 'saga'),
+        penalty=log_reg_params.get('penalty', 'elasticnet'),
+        l1_ratio=log_reg_params.get('l1_ratio', 0.1),
+        tol=log_reg_params.get('tol', 1e-3)
+    )
 
-    print("\nHyperparameter tuning for Random Forest...")
-    models['Random_Forest'] = hyperparameter_tuning(models['Random_Forest'], param_grids['Random_Forest'], X_train_smote, y_train_smote)
+    # Without caller-supplied weights, Random Forest may correct class imbalance per bootstrap sample
+    if sample_weight is None:
+        param_dists['Random_Forest']['class_weight'] = ['balanced_subsample', None]
 
-    print("\nHyperparameter tuning for XGBoost...")
-    # --- Conversion of sparse data to dense (if applicable) ---
-    if isinstance(X_train_smote, pd.DataFrame):
-        X_train_smote = X_train_smote.sparse.to_dense() if isinstance(X_train_smote.dtypes, pd.SparseDtype) else X_train_smote
-    elif isinstance(X_train_smote, np.ndarray):
-        X_train_smote = np.asarray(X_train_smote)
-        
-    models['XGBoost'] = hyperparameter_tuning(models['XGBoost'], param_grids['XGBoost'], X_train_smote, y_train_smote)
+    if preprocess:
+        models = {name: build_pipeline(name, model, config['project']['random_state']) for name, model in models.items()}
 
-    return models
+    # Base models are independent: fit them in parallel processes, giving each an equal share of the cores
+    n_cpus = os.cpu_count() or 1
+    n_workers = min(len(models), n_cpus)
+    n_threads = max(1, n_cpus // n_workers)
 
-# --------------------------------------------------------------
-# 11. Save Models as .pkl Files
-# --------------------------------------------------------------
-def save_models(models, config):
-    folder_path = config['paths']['models_folder']
-    os.makedirs(folder_path, exist_ok=True)
-    
-    for name, model in models.items():
-        file_path = os.path.join(folder_path, f"{name}.pkl")
-        joblib.dump(model, file_path)
-        print(f"Saved {name} model to {file_path}")
+    # XGBoost trains on all but a held-out slice, which it uses to decide when to stop boosting
+    train_sets = {name: (X_train_smote, y_train_smote, sample_weight, None) for name in models}
+    if not preprocess:
+        # saga sweeps the rows on every epoch: give it contiguous float32 rather than a DataFrame
+        X_log_reg = np.ascontiguousarray(X_train_smote, dtype=np.float32)
+        train_sets['Logistic_Regression'] = (X_log_reg, y_train_smote, sample_weight, None)
+    if xgb_device == 'cuda':
+        # Contiguous float32 is uploaded to the GPU as-is, once per fit
+        X_xgb = np.ascontiguousarray(X_train_smote, dtype=np.float32)
+    else:
+        X_xgb = X_train_smote
+    # XGBoost isn't resampled in its pipeline, so it gets balanced sample weights instead
+    xgb_weights = compute_sample_weight('balanced', y_train_smote) if preprocess else sample_weight
+    train_sets['XGBoost'] = hold_out_eval_set(X_xgb, y_train_smote, xgb_weights, config['project']['random_state'])
+
+    # The GPU runs one fit at a time, so a GPU search gets a single job
+    n_jobs = {name: n_threads for name in models}
+    if xgb_device == 'cuda':
+        n_jobs['XGBoost'] = 1
+
+    fitted = Parallel(n_jobs=n_workers, backend='loky')(
+        delayed(fit_model)(name, model, param_dists.get(name), X, y, weights, n_jobs[name],
+                           config['project']['random_state'], eval_set)
+        for name, model in models.items()
+        for X, y, weights, eval_set in [train_sets[name]]
+    )
+
+    return dict(fitted)
 
 # --------------------------------------------------------------
-# 12. Main Execution - Training and Saving Models
+# 11. Main Execution - Training and Saving Models
 # --------------------------------------------------------------
 if __name__ == "__main__":
     # Load preprocessed DataFrame (from feature engineering)
     df = pd.read_csv('SpanishLaliga_Eng.csv')
-
-    # Handle Sparse Data - Convert to dense if necessary
-    df = handle_sparse_data(df)
     
     # Run all preprocessing steps
     df = encode_target(df)
@@ -165,17 +365,11 @@ if __name__ == "__main__":
     df = transform_dates(df)
     
     # Select features and perform train-test split
-    df_clean = select_features(df)
+    df_clean = downcast_features(select_features(df))
     X_train, X_test, y_train, y_test = split_data(df_clean, df)
     
-    # Scale features
-    X_train_scaled, X_test_scaled, scaler = scale_features(X_train, X_test)
-    
-    # Handle class imbalance with SMOTETomek
-    X_train_smote, y_train_smote = apply_smote_tomek(X_train_scaled, y_train)
-    
-    # Train models
-    models = train_models(X_train_smote, y_train_smote, config)
+    # Train models; scaling and SMOTETomek are fitted inside every CV fold, not on the whole training set
+    models = train_models(X_train, y_train, config, preprocess=True)
     
     # Save trained models as .pkl files
     save_models(models, config)
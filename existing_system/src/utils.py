@@ -1,8 +1,23 @@
 import yaml
 import logging
 import os
+import pickle
+import importlib.util
 import joblib
 
+# Model files are compressed with LZ4 when it is installed (much faster than zlib at a similar ratio)
+MODEL_COMPRESSION = ('lz4', 3) if importlib.util.find_spec('lz4') else ('zlib', 3)
+
+# Read buffer for loading model files, so deserializing issues few large reads
+MODEL_READ_BUFFER = 1 << 20
+
+# Every module logs through this one named logger, so its handlers are set up only once
+LOGGER_NAME = 'alpha_betting'
+
+def dump_model(model, filename):
+    """Write a model to disk compressed, with the highest pickle protocol."""
+    joblib.dump(model, filename, compress=MODEL_COMPRESSION, protocol=pickle.HIGHEST_PROTOCOL)
+
 def load_config(config_path):
     """
     Load the YAML configuration file.
@@ -30,11 +45,16 @@ def setup_logger(config):
     Returns:
         logger (logging.Logger): Configured logger.
     """
+    logger = logging.getLogger(LOGGER_NAME)
+    # Already configured by an earlier call: don't open another log file or duplicate the output
+    if logger.handlers:
+        return logger
+
     log_file = config['paths']['logs_folder'] + 'app.log'
     log_level = getattr(logging, config['project']['logging_level'], logging.INFO)
     
-    logger = logging.getLogger(__name__)
     logger.setLevel(log_level)
+    logger.propagate = False
     
     # Create file handler
     if not os.path.exists(os.path.dirname(log_file)):
@@ -51,10 +71,8 @@ def setup_logger(config):
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    # Add handlers to the logger if not already added
-    if not logger.hasHandlers():
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
     
     return logger
 
@@ -70,18 +88,20 @@ def save_model(model, filename):
         folder = os.path.dirname(filename)
         if not os.path.exists(folder):
             os.makedirs(folder)
-        joblib.dump(model, filename)
+        dump_model(model, filename)
         print(f"Model saved to {filename}")
     except Exception as e:
         print(f"Error saving model: {e}")
 
-def save_models(models, config):
+def save_models(models, config, preprocessors=None):
     """
     Save multiple models to files in the models folder.
     
     Args:
         models (dict): Dictionary of trained models.
         config (dict): Configuration settings.
+        preprocessors (dict, optional): Fitted preprocessing steps (e.g. {'scaler': scaler}) saved
+            next to the models, so inference reuses them instead of refitting on the training data.
     """
     folder_path = config['paths']['models_folder']
     
@@ -90,9 +110,14 @@ def save_models(models, config):
     
     for name, model in models.items():
         file_path = os.path.join(folder_path, f"{name.replace(' ', '_')}.pkl")
-        joblib.dump(model, file_path)
+        dump_model(model, file_path)
         print(f"Saved {name} model to {file_path}")
 
+    for name, preprocessor in (preprocessors or {}).items():
+        file_path = os.path.join(folder_path, f"{name}.pkl")
+        dump_model(preprocessor, file_path)
+        print(f"Saved {name} to {file_path}")
+
 def load_model(filename):
     """
     Load a model from a pickle file.
@@ -104,7 +129,8 @@ def load_model(filename):
         model: Loaded model object.
     """
     try:
-        model = joblib.load(filename)
+        with open(filename, 'rb', buffering=MODEL_READ_BUFFER) as f:
+            model = joblib.load(f)
         print(f"Model loaded from {filename}")
         return model
     except Exception as e:
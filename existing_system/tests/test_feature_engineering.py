@@ -0,0 +1,208 @@
+# tests/test_feature_engineering.py
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.feature_engineering import (
+    apply_feature_engineering, fit_features, transform_feature, generate_features, team_ids,
+)
+
+def make_matches():
+    """Ten matches between three teams of one league, one week apart."""
+    df = pd.DataFrame({
+        'Date': pd.date_range('2023-08-12', periods=10, freq='7D'),
+        'Home Team': ['Arsenal', 'Chelsea', 'Everton', 'Arsenal', 'Chelsea',
+                      'Everton', 'Arsenal', 'Chelsea', 'Everton', 'Arsenal'],
+        'Away Team': ['Chelsea', 'Everton', 'Arsenal', 'Everton', 'Arsenal',
+                      'Chelsea', 'Chelsea', 'Everton', 'Arsenal', 'Everton'],
+        'HG': [2, 1, 0, 3, 1, 2, 0, 2, 1, 1],
+        'AG': [1, 1, 2, 0, 1, 2, 1, 0, 3, 0],
+    })
+    df['Result'] = np.where(df['HG'] > df['AG'], 'H', np.where(df['HG'] < df['AG'], 'A', 'D'))
+    return df
+
+# Features of make_matches() computed by the original pandas groupby/iterrows implementation
+BASELINE_FEATURES = {
+    'HW': [1, 0, 0, 2, 0, 0, 2, 1, 0, 2],
+    'HL': [0, 0, 1, 0, 0, 1, 1, 0, 2, 1],
+    'HGF': [2, 1, 0, 5, 2, 2, 5, 4, 3, 4],
+    'HGA': [1, 1, 2, 1, 2, 4, 2, 2, 7, 1],
+    'HWGD': [1, 0, -2, 4, 0, -2, 3, 2, -4, 3],
+    'AGF': [1, 1, 2, 1, 3, 3, 4, 1, 6, 0],
+    'AGA': [2, 1, 0, 4, 1, 4, 4, 6, 2, 6],
+    'home_rolling_goals': [2, 1, 0, 2.5, 1, 1, 5 / 3, 4 / 3, 1, 1.5],
+    'away_rolling_goals': [1, 1, 2, 0.5, 1.5, 1.5, 4 / 3, 1 / 3, 2, 0.25],
+    'HGF_3': [2, 1, 0, 5, 2, 2, 5, 4, 3, 4],
+    'HGF_10': [2, 1, 0, 5, 2, 2, 5, 4, 3, 6],
+    'AGF_3': [1, 1, 2, 1, 3, 3, 4, 1, 6, 0],
+    'AGF_10': [1, 1, 2, 1, 3, 3, 4, 1, 6, 1],
+    'Home_Offensive_Elo': [1511.875, 1482.0625, 1462.00109, 1553.22755, 1475.37921,
+                           1446.75935, 1513.14501, 1488.41277, 1412.99425, 1531.23864],
+    'Home_Defensive_Elo': [1510.0, 1498.3644, 1498.01584, 1566.28155, 1509.46286,
+                           1456.76484, 1581.29095, 1553.62436, 1416.63515, 1613.31575],
+    'Away_Offensive_Elo': [1490.0, 1489.7606, 1521.79666, 1433.47905, 1542.12909,
+                           1485.19932, 1476.8732, 1418.30162, 1541.73514, 1386.27682],
+    'Away_Defensive_Elo': [1488.125, 1507.9375, 1537.75951, 1466.58495, 1572.96484,
+                           1496.18256, 1525.16663, 1445.22527, 1586.59832, 1427.13165],
+}
+
+def make_history(n_matches=400, seed=0):
+    """Random two-league, multi-season history in which both leagues share team names."""
+    rng = np.random.default_rng(seed)
+    teams = np.array([f'Team {i}' for i in range(8)])
+    home = rng.integers(0, 8, n_matches)
+    away = (home + rng.integers(1, 8, n_matches)) % 8
+    home_goals = rng.integers(0, 4, n_matches)
+    away_goals = rng.integers(0, 4, n_matches)
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-08-01', periods=n_matches, freq='D'),
+        'Season': np.repeat(['2020/2021', '2021/2022'], n_matches // 2),
+        'League': rng.choice(['Premier League', 'Championship'], n_matches),
+        'Home Team': teams[home],
+        'Away Team': teams[away],
+        'HG': home_goals,
+        'AG': away_goals,
+        'Result': np.where(home_goals > away_goals, 'H', np.where(home_goals < away_goals, 'A', 'D')),
+    })
+
+class TestFeatureValues(unittest.TestCase):
+
+    def setUp(self):
+        self.features = generate_features(make_matches())
+
+    def test_unchanged_features_match_baseline(self):
+        """Rolling sums/means and Elo ratings keep the values of the original implementation."""
+        for column, expected in BASELINE_FEATURES.items():
+            with self.subTest(column=column):
+                # The kernels produce float32, so compare to float32 precision
+                np.testing.assert_allclose(self.features[column].to_numpy(dtype=np.float64), expected, rtol=1e-6)
+
+    def test_away_win_flags_away_wins(self):
+        """away_win/away_loss follow the away side (the original set away_win on home wins)."""
+        results = make_matches()['Result']
+        self.assertEqual(self.features['away_win'].tolist(), (results == 'A').astype(int).tolist())
+        self.assertEqual(self.features['away_loss'].tolist(), (results == 'H').astype(int).tolist())
+        # The original counted the away team's losses as AW and its wins as AL
+        self.assertEqual(self.features['AW'].tolist(), [0, 0, 1, 0, 1, 0, 1, 0, 2, 0])
+        self.assertEqual(self.features['AL'].tolist(), [1, 0, 0, 1, 0, 1, 1, 2, 0, 3])
+
+    def test_form_points_score_wins(self):
+        """Previous results score W=3, D=1, L=0 for each side (the original scored every win as 0)."""
+        expected = {
+            'HM1_points': [1, 1, 1, 3, 1, 0, 3, 1, 1, 0],
+            'HM2_points': [1, 1, 1, 1, 1, 1, 3, 1, 0, 3],
+            'HM3_points': [1, 1, 1, 1, 1, 1, 1, 1, 1, 3],
+            'AM1_points': [1, 1, 1, 1, 3, 0, 1, 0, 1, 0],
+            'AM2_points': [1, 1, 1, 1, 1, 1, 0, 1, 3, 0],
+            'AM3_points': [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        }
+        for column, points in expected.items():
+            with self.subTest(column=column):
+                self.assertEqual(self.features[column].tolist(), points)
+
+    def test_form_points_with_categorical_results_without_draws(self):
+        """A categorical Result as loaded from the league files works even without a 'D' category."""
+        df = pd.DataFrame({
+            'Date': pd.date_range('2024-01-06', periods=4, freq='7D'),
+            'Home Team': ['Roma', 'Lazio', 'Roma', 'Lazio'],
+            'Away Team': ['Lazio', 'Roma', 'Lazio', 'Roma'],
+            'HG': pd.array([1, 0, 2, 3], dtype='Int8'),
+            'AG': pd.array([0, 1, 1, 0], dtype='Int8'),
+            'Result': pd.Categorical(['H', 'A', 'H', 'H']),
+        })
+        features = apply_feature_engineering(df)
+        self.assertEqual(features['HM1_points'].tolist(), [1, 1, 3, 0])
+        self.assertEqual(features['AM1_points'].tolist(), [1, 1, 0, 3])
+
+    def test_league_column_keeps_per_team_windows(self):
+        """With a League column the away side is still grouped per team, not per (home, away) pairing."""
+        df = make_matches()
+        df['League'] = 'Premier League'
+        features = generate_features(df)
+        for column in ('AW', 'AL', 'AGF', 'AGA', 'AM1_points', 'Away_Streak', 'HW', 'HGF', 'Home_Streak'):
+            with self.subTest(column=column):
+                self.assertEqual(features[column].tolist(), self.features[column].tolist())
+        # Everton's last three away matches (at Arsenal twice, at Chelsea) add up, as one team
+        self.assertEqual(features['AGA'].iloc[-1], 6)
+
+    def test_streaks_follow_each_teams_results(self):
+        """Streaks count consecutive wins up and losses down per team; a draw resets, a win after a loss restarts at 1."""
+        # Arsenal at home: W, W, L, W; Everton away: D, L, L, L
+        self.assertEqual(self.features['Home_Streak'].tolist(), [1, 0, -1, 2, 0, 0, -1, 1, -1, 1])
+        self.assertEqual(self.features['Away_Streak'].tolist(), [-1, 0, 1, -1, 0, 0, 1, -2, 1, -3])
+
+    def test_win_percentages_are_zero_without_decided_matches(self):
+        """W%/L% are 0 rather than NaN when the window holds only draws (rows 1 and 4 here)."""
+        np.testing.assert_allclose(self.features['HW%'], [1, 0, 0, 1, 0, 0, 2 / 3, 1, 0, 2 / 3], rtol=1e-6)
+        np.testing.assert_allclose(self.features['HL%'], [0, 0, 1, 0, 0, 1, 1 / 3, 0, 1, 1 / 3], rtol=1e-6)
+        for column in ('HW%', 'HL%', 'AW%', 'AL%'):
+            with self.subTest(column=column):
+                self.assertFalse(self.features[column].isna().any())
+                self.assertEqual(self.features[column].iloc[1], 0)
+
+    def test_team_ids_are_scoped_to_the_league(self):
+        """Teams sharing a name in two leagues are separate teams; home and away share one id per team."""
+        df = pd.DataFrame({
+            'League': ['Serie A', 'Serie A', 'Serie B'],
+            'Home Team': ['Roma', 'Lazio', 'Roma'],
+            'Away Team': ['Lazio', 'Roma', 'Lazio'],
+        })
+        home_ids, away_ids = team_ids(df)
+        self.assertEqual(home_ids[0], away_ids[1])
+        self.assertEqual(away_ids[0], home_ids[1])
+        self.assertNotEqual(home_ids[2], home_ids[0])
+        self.assertNotEqual(away_ids[2], away_ids[0])
+
+    def test_leagues_with_shared_team_names_do_not_mix(self):
+        """Interleaving a second league with the same team names leaves each league's features unchanged."""
+        first = make_matches().assign(League='Premier League')
+        second = make_matches().assign(League='Championship', Date=lambda df: df['Date'] + pd.Timedelta(days=1))
+        second[['HG', 'AG']] = second[['AG', 'HG']].to_numpy()
+        second['Result'] = second['Result'].map({'H': 'A', 'D': 'D', 'A': 'H'})
+        features = apply_feature_engineering(pd.concat([first, second], ignore_index=True))
+        expected = apply_feature_engineering(first)
+        for column in ('HW', 'HL', 'AW', 'AL', 'HGF', 'AGA', 'HM1_points', 'Home_Streak', 'Away_Streak'):
+            with self.subTest(column=column):
+                self.assertEqual(features.loc[features['League'] == 'Premier League', column].tolist(),
+                                 expected[column].tolist())
+
+class TestIncrementalFeatures(unittest.TestCase):
+
+    def assert_matches_batch(self, df, n_new):
+        """Features from fit_features/transform_feature equal apply_feature_engineering's for the last rows."""
+        cache = fit_features(df.iloc[:-n_new])
+        incremental = pd.concat(
+            [transform_feature(match, cache) for match in df.iloc[-n_new:].to_dict('records')],
+            ignore_index=True,
+        )
+        batch = apply_feature_engineering(df.copy()).iloc[-n_new:].reset_index(drop=True)
+        columns = [col for col in batch.columns if col not in df.columns]
+        self.assertEqual(set(columns) - set(incremental.columns), set())
+        pd.testing.assert_frame_equal(incremental[columns], batch[columns], check_dtype=False)
+
+    def test_matches_batch_features(self):
+        """The incremental path reproduces the batch features of played matches."""
+        self.assert_matches_batch(make_history(), 40)
+
+    def test_matches_batch_features_without_league_or_season(self):
+        """Team keys and matchdays fall back to team names and one global counter."""
+        self.assert_matches_batch(make_history().drop(columns=['League', 'Season']), 40)
+
+    def test_matches_batch_features_for_future_fixtures(self):
+        """Fixtures without goals or result take a window slot but add no form, as in the batch path."""
+        df = make_history()
+        df.loc[df.index[-5:], ['HG', 'AG']] = np.nan
+        df.loc[df.index[-5:], 'Result'] = None
+        self.assert_matches_batch(df, 10)
+
+    def test_fit_features_does_not_depend_on_input_order(self):
+        """The history is replayed in chronological order whatever order it is passed in."""
+        df = make_history()
+        shuffled = df.sample(frac=1, random_state=1)
+        match = df.iloc[-1].to_dict()
+        first = transform_feature(match, fit_features(df.iloc[:-1]))
+        second = transform_feature(match, fit_features(shuffled[shuffled.index != df.index[-1]]))
+        pd.testing.assert_frame_equal(first, second)
+
+if __name__ == '__main__':
+    unittest.main()
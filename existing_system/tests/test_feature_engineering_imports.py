@@ -0,0 +1,47 @@
+# tests/test_feature_engineering_imports.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# main.py imports the module as src.feature_engineering, predict.py as feature_engineering
+PACKAGE_IMPORT = "from src import feature_engineering as fe"
+FLAT_IMPORT = "import sys; sys.path.insert(0, 'src'); import feature_engineering as fe"
+
+SCRIPT = """
+{import_line}
+import pandas as pd
+df = pd.DataFrame({{
+    'Date': pd.date_range('2024-01-01', periods=6),
+    'Home Team': list('ABCABC'),
+    'Away Team': list('BCABCA'),
+    'HG': [1, 2, 0, 3, 1, 1],
+    'AG': [0, 2, 1, 1, 1, 0],
+    'Result': list('HDAHDH'),
+}})
+out = fe.calculate_elo_ratings(fe.generate_features(df))
+print(out[['HW', 'Home_Streak', 'HGF_3', 'Home_Offensive_Elo']].to_json())
+"""
+
+class TestFeatureEngineeringImports(unittest.TestCase):
+
+    def run_features(self, import_line, cache_dir):
+        env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir, PYTHONPATH=os.getcwd())
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT.format(import_line=import_line)],
+            capture_output=True, text=True, env=env,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.strip().splitlines()[-1]
+
+    def test_both_import_paths_share_a_numba_cache(self):
+        """Importing the module one way must not break the other way in the next process."""
+        for first, second in ((FLAT_IMPORT, PACKAGE_IMPORT), (PACKAGE_IMPORT, FLAT_IMPORT)):
+            with self.subTest(first=first), tempfile.TemporaryDirectory() as cache_dir:
+                self.assertEqual(self.run_features(first, cache_dir),
+                                 self.run_features(second, cache_dir))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+# tests/test_train_and_save_models.py
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.train_and_save_models import encode_results, encode_target, encode_teams
+
+class TestEncoding(unittest.TestCase):
+
+    def test_encode_results_codes(self):
+        """Results encode to H=0, D=1, A=2 as int8; anything else, fixtures included, is -1."""
+        codes, _ = encode_results(pd.Series(['H', 'D', 'A', 'TBD', None, 'X']))
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertEqual(codes.tolist(), [0, 1, 2, -1, -1, -1])
+
+    def test_encode_results_splits_history_and_fixtures(self):
+        """Only 'TBD' rows are fixtures, and only H/D/A rows are history; other rows are in neither."""
+        codes, is_future = encode_results(pd.Series(['H', 'TBD', 'A', None, 'TBD', 'D']))
+        self.assertEqual(is_future.tolist(), [False, True, False, False, True, False])
+        # Unlike the original `Result != 'TBD'` filter, a missing result no longer counts as history
+        self.assertEqual((codes >= 0).tolist(), [True, False, True, False, False, True])
+
+    def test_encode_target(self):
+        """Result_Numeric is an int8 column; results without a class are -1 instead of the original NaN."""
+        df = encode_target(pd.DataFrame({'Result': ['A', 'H', 'D', None]}))
+        self.assertEqual(df['Result_Numeric'].dtype, np.int8)
+        self.assertEqual(df['Result_Numeric'].tolist(), [2, 0, 1, -1])
+
+    def test_encode_teams_shares_codes_between_sides(self):
+        """A team gets one code on both sides, including teams that only ever play away."""
+        df = encode_teams(pd.DataFrame({
+            'Home Team': ['Roma', 'Lazio', 'Roma'],
+            'Away Team': ['Lazio', 'Napoli', 'Napoli'],
+        }))
+        self.assertEqual(df['Home Team'].dtype, np.int32)
+        self.assertEqual(df['Away Team'].dtype, np.int32)
+        self.assertEqual(df['Home Team'].tolist(), [0, 1, 0])
+        # Napoli never plays at home; the original encoder fitted on home teams raised on it
+        self.assertEqual(df['Away Team'].tolist(), [1, 2, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,19 +2,36 @@
 """
 Initialize database schema for football betting system
 """
-import psycopg2
+import io
+from psycopg2.extras import execute_values
 import sys
+from db import get_conn
+
+
+def bulk_load_fixtures(df, conn):
+    """
+    Bulk-load fixtures into raw.fixtures with COPY instead of per-row INSERTs.
+
+    Args:
+        df (pd.DataFrame): Rows to load; column names must match raw.fixtures columns.
+        conn: Open psycopg2 connection. The load runs in a single transaction.
+
+    Returns:
+        int: Number of rows loaded.
+    """
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    columns = ', '.join(df.columns)
+    with conn:
+        with conn.cursor() as cursor:
+            # The fixtures can be re-ingested, so skip the WAL flush wait for this transaction only
+            cursor.execute("SET LOCAL synchronous_commit = OFF;")
+            cursor.copy_expert(f"COPY raw.fixtures ({columns}) FROM STDIN WITH (FORMAT csv)", buf)
+    return len(df)
 
 def main():
-    # Connection parameters - match your docker-compose settings
-    connection_params = {
-        'host': 'localhost',
-        'port': 5433,
-        'database': 'football_betting',
-        'user': 'betting_user',
-        'password': 'betting_password'
-    }
-    
     # SQL statements to create the raw schema and tables
     sql_statements = [
         # Create raw schema
@@ -89,49 +106,53 @@ def main():
         
         # Create indexes for performance
         "CREATE INDEX IF NOT EXISTS idx_fixtures_league_season ON raw.fixtures(league_external_code, season);",
-        "CREATE INDEX IF NOT EXISTS idx_fixtures_match_date ON raw.fixtures(match_date);",
+        # BRIN suits the append-mostly, date-ordered fixtures table at a fraction of a btree's size
+        "CREATE INDEX IF NOT EXISTS idx_fixtures_date_brin ON raw.fixtures USING BRIN(match_date) WITH (pages_per_range=32);",
+        # Serves "latest matches per league" without a sort
+        "CREATE INDEX IF NOT EXISTS idx_fixtures_league_date ON raw.fixtures(league_external_code, match_date DESC);",
+        # Superseded by the two indexes above
+        "DROP INDEX IF EXISTS raw.idx_fixtures_match_date;",
         "CREATE INDEX IF NOT EXISTS idx_odds_fixture_id ON raw.odds_snapshots(fixture_external_id);",
         "CREATE INDEX IF NOT EXISTS idx_odds_bookmaker ON raw.odds_snapshots(bookmaker_name);",
     ]
     
     try:
         print("Connecting to database...")
-        conn = psycopg2.connect(**connection_params)
-        conn.autocommit = True  # Enable autocommit for DDL statements
-        cursor = conn.cursor()
+        # Enable autocommit for DDL statements; the pooled connection is returned on exit
+        with get_conn(autocommit=True) as conn:
+            cursor = conn.cursor()
         
-        print("Creating database schema...")
+            print("Creating database schema...")
         
-        # Execute all SQL statements
-        for i, sql in enumerate(sql_statements, 1):
-            print(f"  Executing statement {i}/{len(sql_statements)}...")
-            try:
-                cursor.execute(sql)
-            except Exception as e:
-                print(f"    Warning: {e}")
-                continue
+            # Execute all SQL statements
+            for i, sql in enumerate(sql_statements, 1):
+                print(f"  Executing statement {i}/{len(sql_statements)}...")
+                try:
+                    cursor.execute(sql)
+                except Exception as e:
+                    print(f"    Warning: {e}")
+                    continue
         
-        # Insert default leagues (Big 5 European leagues)
-        print("\nInserting default leagues...")
-        leagues = [
-            ('E0', 'English Premier League', 'England', 1, 'football-data.co.uk'),
-            ('SP1', 'Spanish La Liga', 'Spain', 1, 'football-data.co.uk'),
-            ('D1', 'German Bundesliga', 'Germany', 1, 'football-data.co.uk'),
-            ('I1', 'Italian Serie A', 'Italy', 1, 'football-data.co.uk'),
-            ('F1', 'French Ligue 1', 'France', 1, 'football-data.co.uk'),
-        ]
+            # Insert default leagues (Big 5 European leagues)
+            print("\nInserting default leagues...")
+            leagues = [
+                ('E0', 'English Premier League', 'England', 1, 'football-data.co.uk'),
+                ('SP1', 'Spanish La Liga', 'Spain', 1, 'football-data.co.uk'),
+                ('D1', 'German Bundesliga', 'Germany', 1, 'football-data.co.uk'),
+                ('I1', 'Italian Serie A', 'Italy', 1, 'football-data.co.uk'),
+                ('F1', 'French Ligue 1', 'France', 1, 'football-data.co.uk'),
+            ]
         
-        for league in leagues:
-            cursor.execute("""
+            # All rows in a single multi-row INSERT (one round-trip)
+            execute_values(cursor, """
                 INSERT INTO raw.leagues (external_id, league_name, country, tier, source_system, available_at)
-                VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                VALUES %s
                 ON CONFLICT (external_id) DO NOTHING
-            """, league)
+            """, leagues, template="(%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)")
         
-        print(f"Inserted {len(leagues)} leagues")
+            print(f"Inserted {len(leagues)} leagues")
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         print("\n✅ Database schema initialized successfully!")
         return 0
@@ -7,10 +7,119 @@ Building on existing database schema
 
 import psycopg2
 import numpy as np
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from datetime import datetime, timedelta
 import sys
 import math
+from functools import lru_cache
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the kernels then run as plain Python loops
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Scorelines considered per side (0..MAX_GOALS goals)
+MAX_GOALS = 6
+
+def tau_correction(home_goals, away_goals, lambda_h, mu_a, rho):
+    """
+    Tau correction function for low-scoring matches
+    Based on Dixon-Coles 1997 formula
+    """
+    if home_goals == 0 and away_goals == 0:
+        return 1 - lambda_h * mu_a * rho
+    elif home_goals == 0 and away_goals == 1:
+        return 1 + lambda_h * rho
+    elif home_goals == 1 and away_goals == 0:
+        return 1 + mu_a * rho
+    elif home_goals == 1 and away_goals == 1:
+        return 1 - rho
+    else:
+        return 1.0
+
+@njit(cache=True, fastmath=True)
+def _predict_kernel(lambda_h, mu_a, rho):
+    """
+    Outcome probabilities of the tau-corrected scoreline grid for Poisson means lambda_h and mu_a
+    
+    The grid size is read from the MAX_GOALS global, which Numba freezes as a compile-time
+    constant, so the fixed-size loops below can be fully unrolled.
+    
+    Returns:
+        Tuple of (home_win_prob, draw_prob, away_win_prob), normalized to sum to 1
+    """
+    # Poisson PMFs by the recurrence p(k + 1) = p(k) * lambda / (k + 1): no pow or factorial per cell
+    pmf_h = np.empty(MAX_GOALS + 1)
+    pmf_a = np.empty(MAX_GOALS + 1)
+    pmf_h[0] = math.exp(-lambda_h)
+    pmf_a[0] = math.exp(-mu_a)
+    for k in range(MAX_GOALS):
+        pmf_h[k + 1] = pmf_h[k] * lambda_h / (k + 1)
+        pmf_a[k + 1] = pmf_a[k] * mu_a / (k + 1)
+    
+    home_win_prob = 0.0
+    draw_prob = 0.0
+    away_win_prob = 0.0
+    
+    for i in range(MAX_GOALS + 1):
+        for j in range(MAX_GOALS + 1):
+            # Poisson probability
+            score_prob = pmf_h[i] * pmf_a[j]
+            
+            # Apply tau correction (inlined: it only differs from 1 for 0-0, 0-1, 1-0 and 1-1)
+            if i < 2 and j < 2:
+                if i == 0 and j == 0:
+                    score_prob *= 1 - lambda_h * mu_a * rho
+                elif i == 0:
+                    score_prob *= 1 + lambda_h * rho
+                elif j == 0:
+                    score_prob *= 1 + mu_a * rho
+                else:
+                    score_prob *= 1 - rho
+            
+            if i > j:
+                home_win_prob += score_prob
+            elif i == j:
+                draw_prob += score_prob
+            else:
+                away_win_prob += score_prob
+    
+    # Normalize to ensure sum = 1
+    total = home_win_prob + draw_prob + away_win_prob
+    if total > 0:
+        home_win_prob /= total
+        draw_prob /= total
+        away_win_prob /= total
+    
+    return home_win_prob, draw_prob, away_win_prob
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _predict_batch_kernel(lambda_h, mu_a, rho):
+    """_predict_kernel for arrays of Poisson means: an (N, 3) array of outcome probabilities"""
+    probs = np.empty((lambda_h.shape[0], 3))
+    for k in prange(lambda_h.shape[0]):
+        probs[k, 0], probs[k, 1], probs[k, 2] = _predict_kernel(lambda_h[k], mu_a[k], rho)
+    return probs
+
+@lru_cache(maxsize=4096)
+def _predict_cached(home_attack, home_defense, away_attack, away_defense, home_advantage, rho):
+    """
+    Outcome probabilities for one set of team parameters, memoized on the (hashable) floats
+    
+    Returns:
+        Tuple of (home_win_prob, draw_prob, away_win_prob, lambda_h, mu_a)
+    """
+    # Expected goals (Poisson means), with home advantage applied to the home attack
+    lambda_h = home_attack * (1 + home_advantage) * away_defense
+    mu_a = away_attack * home_defense
+    
+    home_win_prob, draw_prob, away_win_prob = _predict_kernel(lambda_h, mu_a, rho)
+    return float(home_win_prob), float(draw_prob), float(away_win_prob), lambda_h, mu_a
 
 def setup_database():
     """Setup database connection and ensure features table exists"""
@@ -82,16 +191,42 @@ def get_training_data(cursor, limit=1000):
         LIMIT %s;
     """
     
-    cursor.execute(query, (limit,))
-    matches = cursor.fetchall()
+    # Named (server-side) cursor: rows arrive in chunks of itersize and go straight into columns,
+    # so the full result set is never held as a list of row tuples
+    columns = [[] for _ in range(6)]
+    with cursor.connection.cursor(name='training_data') as server_cursor:
+        server_cursor.itersize = 10000
+        server_cursor.execute(query, (limit,))
+        for row in server_cursor:
+            for column, value in zip(columns, row):
+                column.append(value)
+    fixture_ids, home_teams, away_teams, home_goals, away_goals, match_dates = columns
     
-    if len(matches) < 100:
-        print(f"ERROR: Only {len(matches)} matches found. Need at least 100.")
+    if len(fixture_ids) < 100:
+        print(f"ERROR: Only {len(fixture_ids)} matches found. Need at least 100.")
         return None
     
-    print(f"SUCCESS: Retrieved {len(matches)} historical matches")
+    # Structure of arrays: both team columns share one integer id per team (names in 'teams'),
+    # and dates become days before the most recent match
+    teams, team_idx = np.unique(np.array(home_teams + away_teams), return_inverse=True)
+    match_dates = np.array(match_dates, dtype='datetime64[D]')
+    matches = {
+        'fixture_id': np.array(fixture_ids, dtype=object),
+        'teams': teams,
+        'home_idx': team_idx[:len(fixture_ids)].astype(np.int32),
+        'away_idx': team_idx[len(fixture_ids):].astype(np.int32),
+        'home_goals': np.array(home_goals, dtype=np.int8),
+        'away_goals': np.array(away_goals, dtype=np.int8),
+        'days': (match_dates.max() - match_dates).astype(np.int32)
+    }
+    
+    print(f"SUCCESS: Retrieved {len(fixture_ids)} historical matches")
     return matches
 
+def slice_matches(matches, index):
+    """Rows `index` (a slice or index array) of the columnar match data; the team names are shared"""
+    return {key: values if key == 'teams' else values[index] for key, values in matches.items()}
+
 class DixonColesModel:
     """Dixon-Coles model implementation based on research specifications"""
     
@@ -107,8 +242,11 @@ class DixonColesModel:
         self.xi = xi
         self.home_advantage = home_advantage
         self.rho = rho
-        self.team_attack = {}  # Attack strength for each team
-        self.team_defense = {}  # Defense strength for each team
+        # Attack/defense strengths as float32 arrays indexed by team id (see team_to_idx); the
+        # extra last slot holds the 1.0 default, so an unknown team's index is -1
+        self.team_to_idx = {}
+        self.attack = np.ones(1, dtype=np.float32)
+        self.defense = np.ones(1, dtype=np.float32)
         self.teams = set()
         
     def time_decay_weight(self, match_date, current_date):
@@ -117,101 +255,78 @@ class DixonColesModel:
         return math.exp(-self.xi * days_diff)
     
     def tau_correction(self, home_goals, away_goals, lambda_h, mu_a):
-        """
-        Tau correction function for low-scoring matches
-        Based on Dixon-Coles 1997 formula
-        """
-        if home_goals == 0 and away_goals == 0:
-            return 1 - lambda_h * mu_a * self.rho
-        elif home_goals == 0 and away_goals == 1:
-            return 1 + lambda_h * self.rho
-        elif home_goals == 1 and away_goals == 0:
-            return 1 + mu_a * self.rho
-        elif home_goals == 1 and away_goals == 1:
-            return 1 - self.rho
-        else:
-            return 1.0
+        """Tau correction for low-scoring matches, with this model's rho"""
+        return tau_correction(home_goals, away_goals, lambda_h, mu_a, self.rho)
     
-    def fit(self, matches, current_date=None):
+    def fit(self, matches, reference_days=None):
         """
         Fit Dixon-Coles model to historical matches
         
         Args:
-            matches: List of match tuples
-            current_date: Reference date for time weighting
+            matches: Columnar match data (dictionary of arrays, see get_training_data)
+            reference_days: Reference point for time weighting, in days before the latest
+                fetched match (defaults to the most recent training match)
         """
         print("[4/5] Training Dixon-Coles model...")
         
-        if current_date is None:
-            # Use most recent match date
-            current_date = max(match[5] for match in matches)
+        # Memoized predictions belong to the previous parameters
+        _predict_cached.cache_clear()
         
-        # Collect team statistics with time weighting
-        team_stats = {}
+        teams = matches['teams']
+        home_idx, away_idx = matches['home_idx'], matches['away_idx']
+        home_goals = matches['home_goals'].astype(float)
+        away_goals = matches['away_goals'].astype(float)
         
-        for match in matches:
-            fixture_id, home_team, away_team, home_goals, away_goals, match_date = match
-            
-            # Add teams to set
-            self.teams.add(home_team)
-            self.teams.add(away_team)
-            
-            # Calculate time weight
-            weight = self.time_decay_weight(match_date, current_date)
-            
-            # Initialize team stats if needed
-            if home_team not in team_stats:
-                team_stats[home_team] = {
-                    'goals_scored': 0.0,
-                    'goals_conceded': 0.0,
-                    'weighted_matches': 0.0
-                }
-            if away_team not in team_stats:
-                team_stats[away_team] = {
-                    'goals_scored': 0.0,
-                    'goals_conceded': 0.0,
-                    'weighted_matches': 0.0
-                }
-            
-            # Update home team stats with time weighting
-            team_stats[home_team]['goals_scored'] += home_goals * weight
-            team_stats[home_team]['goals_conceded'] += away_goals * weight
-            team_stats[home_team]['weighted_matches'] += weight
-            
-            # Update away team stats with time weighting
-            team_stats[away_team]['goals_scored'] += away_goals * weight
-            team_stats[away_team]['goals_conceded'] += home_goals * weight
-            team_stats[away_team]['weighted_matches'] += weight
+        if reference_days is None:
+            # Use most recent match date
+            reference_days = matches['days'].min()
+        
+        # Time decay weights: exp(-xi * days_difference). The day gaps are integers in a bounded
+        # range, so tabulate exp once per distinct gap and gather the weights from the table
+        days_diff = matches['days'] - reference_days
+        min_diff = int(days_diff.min())
+        weights_table = np.exp(-self.xi * np.arange(min_diff, int(days_diff.max()) + 1))
+        weight = np.take(weights_table, days_diff - min_diff)
+        
+        # Weighted team statistics, summed over home and away appearances
+        n_teams = len(teams)
+        goals_scored = (np.bincount(home_idx, weight * home_goals, n_teams) +
+                        np.bincount(away_idx, weight * away_goals, n_teams))
+        goals_conceded = (np.bincount(home_idx, weight * away_goals, n_teams) +
+                          np.bincount(away_idx, weight * home_goals, n_teams))
+        weighted_matches = np.bincount(home_idx, weight, n_teams) + np.bincount(away_idx, weight, n_teams)
+        played = weighted_matches > 0
+        self.teams.update(teams[played].tolist())
         
         # Calculate league average goals (weighted)
-        total_weighted_goals = sum(stats['goals_scored'] for stats in team_stats.values())
-        total_weighted_matches = sum(stats['weighted_matches'] for stats in team_stats.values())
+        total_weighted_goals = goals_scored.sum()
+        total_weighted_matches = weighted_matches.sum()
         league_avg_goals = total_weighted_goals / total_weighted_matches if total_weighted_matches > 0 else 1.5
         
         print(f"  - League average goals: {league_avg_goals:.3f}")
-        print(f"  - Teams analyzed: {len(team_stats)}")
+        print(f"  - Teams analyzed: {np.count_nonzero(played)}")
         
         # Calculate attack and defense parameters
-        for team, stats in team_stats.items():
-            if stats['weighted_matches'] > 0:
-                avg_scored = stats['goals_scored'] / stats['weighted_matches']
-                avg_conceded = stats['goals_conceded'] / stats['weighted_matches']
-                
-                attack = avg_scored / league_avg_goals
-                defense = avg_conceded / league_avg_goals
-                
-                self.team_attack[team] = attack
-                self.team_defense[team] = defense
-        
-        # Normalize parameters (sum of attack parameters = 1)
-        avg_attack = np.mean(list(self.team_attack.values())) if self.team_attack else 1.0
-        for team in self.team_attack:
-            self.team_attack[team] /= avg_attack
-            self.team_defense[team] /= avg_attack
+        attack = goals_scored[played] / weighted_matches[played] / league_avg_goals
+        defense = goals_conceded[played] / weighted_matches[played] / league_avg_goals
+        
+        # Normalize parameters (mean attack parameter = 1), in place on the arrays
+        if attack.size:
+            inv_avg_attack = 1.0 / attack.mean()
+            attack *= inv_avg_attack
+            defense *= inv_avg_attack
+        
+        self.team_to_idx = {team: idx for idx, team in enumerate(teams[played].tolist())}
+        self.attack = np.append(attack, 1.0).astype(np.float32)
+        self.defense = np.append(defense, 1.0).astype(np.float32)
         
         print("  - Model training complete")
         return True
     
+    def team_indices(self, teams):
+        """Ids of the given team names into the parameter arrays (-1, the default slot, if unseen)"""
+        return np.fromiter((self.team_to_idx.get(team, -1) for team in teams), dtype=np.intp, count=len(teams))
+    
     def predict(self, home_team, away_team):
         """
         Predict match outcome probabilities
@@ -220,47 +335,16 @@ class DixonColesModel:
             Dictionary with probabilities and model parameters
         """
         # Get team parameters (default to 1.0 if not trained)
-        home_attack = self.team_attack.get(home_team, 1.0)
-        home_defense = self.team_defense.get(home_team, 1.0)
-        away_attack = self.team_attack.get(away_team, 1.0)
-        away_defense = self.team_defense.get(away_team, 1.0)
-        
-        # Apply home advantage
-        home_attack_adj = home_attack * (1 + self.home_advantage)
-        
-        # Expected goals (Poisson means)
-        lambda_h = home_attack_adj * away_defense
-        mu_a = away_attack * home_defense
-        
-        # Calculate probabilities for reasonable scorelines
-        max_goals = 6
-        home_win_prob = 0.0
-        draw_prob = 0.0
-        away_win_prob = 0.0
-        
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                # Poisson probability
-                poisson_prob = (math.exp(-lambda_h) * (lambda_h ** i) / math.factorial(i)) * \
-                              (math.exp(-mu_a) * (mu_a ** j) / math.factorial(j))
-                
-                # Apply tau correction
-                tau = self.tau_correction(i, j, lambda_h, mu_a)
-                score_prob = poisson_prob * tau
-                
-                if i > j:
-                    home_win_prob += score_prob
-                elif i == j:
-                    draw_prob += score_prob
-                else:
-                    away_win_prob += score_prob
-        
-        # Normalize to ensure sum = 1
-        total = home_win_prob + draw_prob + away_win_prob
-        if total > 0:
-            home_win_prob /= total
-            draw_prob /= total
-            away_win_prob /= total
+        home_idx = self.team_to_idx.get(home_team, -1)
+        away_idx = self.team_to_idx.get(away_team, -1)
+        home_attack = float(self.attack[home_idx])
+        home_defense = float(self.defense[home_idx])
+        away_attack = float(self.attack[away_idx])
+        away_defense = float(self.defense[away_idx])
+        
+        home_win_prob, draw_prob, away_win_prob, lambda_h, mu_a = _predict_cached(
+            home_attack, home_defense, away_attack, away_defense, self.home_advantage, self.rho
+        )
         
         return {
             'home_win_prob': home_win_prob,
@@ -276,6 +360,43 @@ class DixonColesModel:
             'xi': self.xi
         }
     
+    def predict_batch(self, home_teams, away_teams):
+        """
+        Predict match outcome probabilities for many matches at once
+        
+        Args:
+            home_teams, away_teams: Sequences of team names, one entry per match
+        
+        Returns:
+            Dictionary of arrays (one element per match) with probabilities and team parameters
+        """
+        # Gather the float32 team parameters by id, then compute in float64
+        home_idx = self.team_indices(home_teams)
+        away_idx = self.team_indices(away_teams)
+        home_attack = np.take(self.attack, home_idx).astype(np.float64)
+        home_defense = np.take(self.defense, home_idx).astype(np.float64)
+        away_attack = np.take(self.attack, away_idx).astype(np.float64)
+        away_defense = np.take(self.defense, away_idx).astype(np.float64)
+        
+        # Expected goals (Poisson means) of every match
+        lambda_h = home_attack * (1 + self.home_advantage) * away_defense
+        mu_a = away_attack * home_defense
+        
+        # Outcome probabilities of every match, computed in parallel by the compiled kernel
+        probs = _predict_batch_kernel(lambda_h, mu_a, self.rho)
+        
+        return {
+            'home_win_prob': probs[:, 0],
+            'draw_prob': probs[:, 1],
+            'away_win_prob': probs[:, 2],
+            'expected_home_goals': lambda_h,
+            'expected_away_goals': mu_a,
+            'home_attack': home_attack,
+            'home_defense': home_defense,
+            'away_attack': away_attack,
+            'away_defense': away_defense
+        }
+    
     def calculate_brier_score(self, predicted, actual_result):
         """
         Calculate multi-class Brier score
@@ -303,48 +424,50 @@ def store_predictions(cursor, predictions):
     """Store predictions to database"""
     print("\n[5/5] Storing predictions to database...")
     
+    rows = [(
+        pred['fixture_id'],
+        pred['home_win_prob'],
+        pred['draw_prob'],
+        pred['away_win_prob'],
+        pred['home_attack'],
+        pred['away_attack'],
+        pred['home_defense'],
+        pred['away_defense'],
+        pred['rho'],
+        pred['xi'],
+        pred.get('home_advantage', 0.3),
+        pred['expected_home_goals'],
+        pred['expected_away_goals']
+    ) for pred in predictions]
+    
+    # All rows in multi-row INSERTs (one round-trip per 500 predictions)
     stored_count = 0
-    for pred in predictions:
-        try:
-            cursor.execute("""
-                INSERT INTO features.match_features 
-                (fixture_id, dc_home_prob, dc_draw_prob, dc_away_prob,
-                 dc_attack_home, dc_attack_away, dc_defense_home, dc_defense_away,
-                 dc_rho_parameter, dc_xi_parameter, dc_home_advantage,
-                 dc_expected_home_goals, dc_expected_away_goals, calculated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (fixture_id) DO UPDATE SET
-                    dc_home_prob = EXCLUDED.dc_home_prob,
-                    dc_draw_prob = EXCLUDED.dc_draw_prob,
-                    dc_away_prob = EXCLUDED.dc_away_prob,
-                    dc_attack_home = EXCLUDED.dc_attack_home,
-                    dc_attack_away = EXCLUDED.dc_attack_away,
-                    dc_defense_home = EXCLUDED.dc_defense_home,
-                    dc_defense_away = EXCLUDED.dc_defense_away,
-                    dc_rho_parameter = EXCLUDED.dc_rho_parameter,
-                    dc_xi_parameter = EXCLUDED.dc_xi_parameter,
-                    dc_home_advantage = EXCLUDED.dc_home_advantage,
-                    dc_expected_home_goals = EXCLUDED.dc_expected_home_goals,
-                    dc_expected_away_goals = EXCLUDED.dc_expected_away_goals,
-                    calculated_at = EXCLUDED.calculated_at
-            """, (
-                pred['fixture_id'],
-                pred['home_win_prob'],
-                pred['draw_prob'],
-                pred['away_win_prob'],
-                pred['home_attack'],
-                pred['away_attack'],
-                pred['home_defense'],
-                pred['away_defense'],
-                pred['rho'],
-                pred['xi'],
-                pred.get('home_advantage', 0.3),
-                pred['expected_home_goals'],
-                pred['expected_away_goals']
-            ))
-            stored_count += 1
-        except Exception as e:
-            print(f"  Warning: Could not store {pred['fixture_id']}: {e}")
+    try:
+        execute_values(cursor, """
+            INSERT INTO features.match_features 
+            (fixture_id, dc_home_prob, dc_draw_prob, dc_away_prob,
+             dc_attack_home, dc_attack_away, dc_defense_home, dc_defense_away,
+             dc_rho_parameter, dc_xi_parameter, dc_home_advantage,
+             dc_expected_home_goals, dc_expected_away_goals, calculated_at)
+            VALUES %s
+            ON CONFLICT (fixture_id) DO UPDATE SET
+                dc_home_prob = EXCLUDED.dc_home_prob,
+                dc_draw_prob = EXCLUDED.dc_draw_prob,
+                dc_away_prob = EXCLUDED.dc_away_prob,
+                dc_attack_home = EXCLUDED.dc_attack_home,
+                dc_attack_away = EXCLUDED.dc_attack_away,
+                dc_defense_home = EXCLUDED.dc_defense_home,
+                dc_defense_away = EXCLUDED.dc_defense_away,
+                dc_rho_parameter = EXCLUDED.dc_rho_parameter,
+                dc_xi_parameter = EXCLUDED.dc_xi_parameter,
+                dc_home_advantage = EXCLUDED.dc_home_advantage,
+                dc_expected_home_goals = EXCLUDED.dc_expected_home_goals,
+                dc_expected_away_goals = EXCLUDED.dc_expected_away_goals,
+                calculated_at = EXCLUDED.calculated_at
+        """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())", page_size=500)
+        stored_count = len(rows)
+    except Exception as e:
+        print(f"  Warning: Could not store predictions: {e}")
     
     return stored_count
 
@@ -360,43 +483,47 @@ def main():
             return
         
         # Split into training and testing sets
-        split_idx = int(len(matches) * 0.8)
-        train_matches = matches[:split_idx]
-        test_matches = matches[split_idx:]
+        n_matches = len(matches['fixture_id'])
+        split_idx = int(n_matches * 0.8)
+        train_matches = slice_matches(matches, slice(None, split_idx))
+        test_matches = slice_matches(matches, slice(split_idx, None))
+        n_train, n_test = split_idx, n_matches - split_idx
         
-        print(f"  - Training set: {len(train_matches)} matches")
-        print(f"  - Testing set: {len(test_matches)} matches")
+        print(f"  - Training set: {n_train} matches")
+        print(f"  - Testing set: {n_test} matches")
         
         # Train model
         model = DixonColesModel(xi=0.0065, home_advantage=0.3, rho=-0.13)
         model.fit(train_matches)
         
-        # Make predictions on test set
+        # Make predictions on test set, all matches in one vectorized batch
         predictions = []
-        brier_scores = []
         
         print("\nMaking predictions on test set...")
-        for i, match in enumerate(test_matches):
-            fixture_id, home_team, away_team, home_goals, away_goals, match_date = match
-            
-            # Get prediction
-            pred = model.predict(home_team, away_team)
-            pred['fixture_id'] = fixture_id
-            
-            # Determine actual result
-            if home_goals > away_goals:
-                actual_result = 'H'
-            elif home_goals < away_goals:
-                actual_result = 'A'
-            else:
-                actual_result = 'D'
+        home_teams = test_matches['teams'][test_matches['home_idx']]
+        away_teams = test_matches['teams'][test_matches['away_idx']]
+        batch = model.predict_batch(home_teams, away_teams)
+        
+        # Brier scores of all matches at once: actual result one-hot as H/D/A columns 0/1/2
+        probs = np.stack([batch['home_win_prob'], batch['draw_prob'], batch['away_win_prob']], axis=1)
+        goal_diff = test_matches['home_goals'].astype(np.int32) - test_matches['away_goals']
+        outcome = 1 - np.sign(goal_diff)
+        actual = np.zeros_like(probs)
+        actual[np.arange(n_test), outcome] = 1.0
+        brier_scores = ((probs - actual) ** 2).sum(axis=1) / 3.0
+        
+        # As Python floats: psycopg2 can't quote NumPy 2 scalars when the predictions are stored
+        batch = {key: values.tolist() for key, values in batch.items()}
+        
+        for i, fixture_id in enumerate(test_matches['fixture_id']):
+            home_team, away_team = home_teams[i], away_teams[i]
+            home_goals, away_goals = test_matches['home_goals'][i], test_matches['away_goals'][i]
+            actual_result = 'HDA'[outcome[i]]
+            brier = brier_scores[i]
             
-            # Calculate Brier score
-            brier = model.calculate_brier_score(
-                (pred['home_win_prob'], pred['draw_prob'], pred['away_win_prob']),
-                actual_result
-            )
-            brier_scores.append(brier)
+            # This match's slice of the batch prediction
+            pred = {key: values[i] for key, values in batch.items()}
+            pred.update(fixture_id=fixture_id, rho=model.rho, xi=model.xi)
             
             predictions.append(pred)
             
@@ -409,9 +536,9 @@ def main():
                 print(f"    Brier Score: {brier:.4f}")
         
         # Calculate statistics
-        avg_brier = np.mean(brier_scores) if brier_scores else 0
-        min_brier = np.min(brier_scores) if brier_scores else 0
-        max_brier = np.max(brier_scores) if brier_scores else 0
+        avg_brier = brier_scores.mean() if n_test else 0
+        min_brier = brier_scores.min() if n_test else 0
+        max_brier = brier_scores.max() if n_test else 0
         
         print("\n" + "=" * 70)
         print("MODEL PERFORMANCE SUMMARY")
@@ -451,8 +578,8 @@ def main():
         print("=" * 70)
         print(f"Total predictions in database: {total_predictions}")
         print(f"Average probabilities - Home: {avg_probs[0]:.3f}, Draw: {avg_probs[1]:.3f}, Away: {avg_probs[2]:.3f}")
-        print(f"Model trained on: {len(train_matches)} matches")
-        print(f"Predictions validated on: {len(test_matches)} matches")
+        print(f"Model trained on: {n_train} matches")
+        print(f"Predictions validated on: {n_test} matches")
         print(f"Research parameters used:")
         print(f"  - Time decay (xi): 0.0065")
         print(f"  - Home advantage: 30%")
@@ -5,10 +5,42 @@ Stores only essential columns first
 """
 
 import psycopg2
+from psycopg2.extras import execute_values
 import numpy as np
 from datetime import datetime
 import sys
-import math
+
+# Scorelines considered per side (0..MAX_GOALS goals)
+MAX_GOALS = 5
+GOALS = np.arange(MAX_GOALS + 1)
+
+# Scoreline cells (home goals, away goals) of each outcome, fixed by MAX_GOALS: the outcome
+# probabilities are then pmf_home @ CELLS @ pmf_away, without materializing the scoreline grid
+HOME_WIN_CELLS = np.tril(np.ones((MAX_GOALS + 1, MAX_GOALS + 1)), -1)
+DRAW_CELLS = np.eye(MAX_GOALS + 1)
+AWAY_WIN_CELLS = np.triu(np.ones((MAX_GOALS + 1, MAX_GOALS + 1)), 1)
+
+def poisson_pmf_rows(lam):
+    """
+    Poisson probabilities of scoring 0..MAX_GOALS goals, one row per mean in the column vector lam
+    
+    Uses the recurrence p(k + 1) = p(k) * lam / (k + 1), so only p(0) needs an exp.
+    """
+    ratios = np.concatenate([np.exp(-lam), np.broadcast_to(lam / GOALS[1:], (len(lam), MAX_GOALS))], axis=1)
+    return np.cumprod(ratios, axis=1)
+
+# Poisson PMF lookup table over a quantized expected-goals grid (rows: lambda, columns: goals)
+LAMBDA_STEP = 0.01
+LAMBDA_GRID = np.arange(0.0, 6.0 + LAMBDA_STEP, LAMBDA_STEP)
+PMF_TABLE = poisson_pmf_rows(LAMBDA_GRID[:, None])
+
+def poisson_pmf(lam):
+    """Poisson probabilities of scoring 0..MAX_GOALS goals with mean lam"""
+    idx = int(round(lam / LAMBDA_STEP))
+    if idx < len(PMF_TABLE):
+        return PMF_TABLE[idx]
+    # Rare expected-goals rates beyond the grid are computed directly
+    return poisson_pmf_rows(np.array([[lam]]))[0]
 
 def setup_database():
     """Setup database with simple table"""
@@ -74,72 +106,104 @@ def get_training_data(cursor, limit=1000):
         LIMIT %s;
     """
     
-    cursor.execute(query, (limit,))
-    matches = cursor.fetchall()
+    # Named (server-side) cursor: rows arrive in chunks of itersize and go straight into columns,
+    # so the full result set is never held as a list of row tuples
+    columns = [[] for _ in range(6)]
+    with cursor.connection.cursor(name='training_data') as server_cursor:
+        server_cursor.itersize = 10000
+        server_cursor.execute(query, (limit,))
+        for row in server_cursor:
+            for column, value in zip(columns, row):
+                column.append(value)
+    fixture_ids, home_teams, away_teams, home_goals, away_goals, match_dates = columns
     
-    if len(matches) < 100:
-        print(f"ERROR: Only {len(matches)} matches found")
+    if len(fixture_ids) < 100:
+        print(f"ERROR: Only {len(fixture_ids)} matches found")
         return None
     
-    print(f"SUCCESS: Retrieved {len(matches)} matches")
+    # Structure of arrays: both team columns share one integer id per team (names in 'teams'),
+    # and dates become days before the most recent match
+    teams, team_idx = np.unique(np.array(home_teams + away_teams), return_inverse=True)
+    match_dates = np.array(match_dates, dtype='datetime64[D]')
+    matches = {
+        'fixture_id': np.array(fixture_ids, dtype=object),
+        'teams': teams,
+        'home_idx': team_idx[:len(fixture_ids)].astype(np.int32),
+        'away_idx': team_idx[len(fixture_ids):].astype(np.int32),
+        'home_goals': np.array(home_goals, dtype=np.int8),
+        'away_goals': np.array(away_goals, dtype=np.int8),
+        'days': (match_dates.max() - match_dates).astype(np.int32)
+    }
+    
+    print(f"SUCCESS: Retrieved {len(fixture_ids)} matches")
     return matches
 
+def slice_matches(matches, index):
+    """Rows `index` (a slice or index array) of the columnar match data; the team names are shared"""
+    return {key: values if key == 'teams' else values[index] for key, values in matches.items()}
+
+def poisson_pmf_batch(lam):
+    """Poisson probabilities of scoring 0..MAX_GOALS goals, one row per mean in the array lam"""
+    return poisson_pmf_rows(np.asarray(lam, dtype=float)[:, None])
+
 class SimpleDixonColes:
     """Simplified Dixon-Coles model"""
     
     def __init__(self, xi=0.0065, home_advantage=0.3):
         self.xi = xi
         self.home_advantage = home_advantage
-        self.team_attack = {}
-        self.team_defense = {}
+        # Attack/defense strengths as float32 arrays indexed by team id (see team_to_idx); the
+        # extra last slot holds the 1.0 default, so an unknown team's index is -1
+        self.team_to_idx = {}
+        self.attack = np.ones(1, dtype=np.float32)
+        self.defense = np.ones(1, dtype=np.float32)
         
     def fit(self, matches):
         """Simple training based on average goals"""
         print("[4/6] Training model...")
         
-        team_stats = {}
+        # Columnar match data (see get_training_data)
+        teams = matches['teams']
+        home_idx, away_idx = matches['home_idx'], matches['away_idx']
+        home_goals = matches['home_goals'].astype(float)
+        away_goals = matches['away_goals'].astype(float)
         
-        for match in matches:
-            fixture_id, home_team, away_team, home_goals, away_goals, match_date = match
-            
-            # Update home team
-            if home_team not in team_stats:
-                team_stats[home_team] = {'goals_scored': 0, 'goals_conceded': 0, 'matches': 0}
-            team_stats[home_team]['goals_scored'] += home_goals
-            team_stats[home_team]['goals_conceded'] += away_goals
-            team_stats[home_team]['matches'] += 1
-            
-            # Update away team
-            if away_team not in team_stats:
-                team_stats[away_team] = {'goals_scored': 0, 'goals_conceded': 0, 'matches': 0}
-            team_stats[away_team]['goals_scored'] += away_goals
-            team_stats[away_team]['goals_conceded'] += home_goals
-            team_stats[away_team]['matches'] += 1
+        # Team statistics, summed over home and away appearances
+        n_teams = len(teams)
+        goals_scored = np.bincount(home_idx, home_goals, n_teams) + np.bincount(away_idx, away_goals, n_teams)
+        goals_conceded = np.bincount(home_idx, away_goals, n_teams) + np.bincount(away_idx, home_goals, n_teams)
+        matches_played = np.bincount(home_idx, minlength=n_teams) + np.bincount(away_idx, minlength=n_teams)
+        played = matches_played > 0
         
         # Calculate league average
-        total_goals = sum(stats['goals_scored'] for stats in team_stats.values())
-        total_matches = sum(stats['matches'] for stats in team_stats.values())
+        total_goals = goals_scored.sum()
+        total_matches = matches_played.sum()
         league_avg = total_goals / total_matches if total_matches > 0 else 1.5
         
         print(f"  - League average goals: {league_avg:.3f}")
-        print(f"  - Teams analyzed: {len(team_stats)}")
+        print(f"  - Teams analyzed: {np.count_nonzero(played)}")
         
         # Calculate parameters
-        for team, stats in team_stats.items():
-            if stats['matches'] > 0:
-                attack = (stats['goals_scored'] / stats['matches']) / league_avg
-                defense = (stats['goals_conceded'] / stats['matches']) / league_avg
-                self.team_attack[team] = attack
-                self.team_defense[team] = defense
+        attack = (goals_scored[played] / matches_played[played]) / league_avg
+        defense = (goals_conceded[played] / matches_played[played]) / league_avg
+        self.team_to_idx = {team: idx for idx, team in enumerate(teams[played].tolist())}
+        self.attack = np.append(attack, 1.0).astype(np.float32)
+        self.defense = np.append(defense, 1.0).astype(np.float32)
         
         return True
     
+    def team_indices(self, teams):
+        """Ids of the given team names into the parameter arrays (-1, the default slot, if unseen)"""
+        return np.fromiter((self.team_to_idx.get(team, -1) for team in teams), dtype=np.intp, count=len(teams))
+    
     def predict(self, home_team, away_team):
         """Make prediction"""
-        home_attack = self.team_attack.get(home_team, 1.0)
-        home_defense = self.team_defense.get(home_team, 1.0)
-        away_attack = self.team_attack.get(away_team, 1.0)
-        away_defense = self.team_defense.get(away_team, 1.0)
+        home_idx = self.team_to_idx.get(home_team, -1)
+        away_idx = self.team_to_idx.get(away_team, -1)
+        home_attack = float(self.attack[home_idx])
+        home_defense = float(self.defense[home_idx])
+        away_attack = float(self.attack[away_idx])
+        away_defense = float(self.defense[away_idx])
         
         # Apply home advantage
         home_attack_adj = home_attack * (1 + self.home_advantage)
@@ -148,23 +212,11 @@ class SimpleDixonColes:
         home_exp = home_attack_adj * away_defense
         away_exp = away_attack * home_defense
         
-        # Calculate probabilities
-        max_goals = 5
-        home_win = 0.0
-        draw = 0.0
-        away_win = 0.0
-        
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                prob = (math.exp(-home_exp) * (home_exp ** i) / math.factorial(i)) * \
-                       (math.exp(-away_exp) * (away_exp ** j) / math.factorial(j))
-                
-                if i > j:
-                    home_win += prob
-                elif i == j:
-                    draw += prob
-                else:
-                    away_win += prob
+        # Outcome probabilities summed over the fixed scoreline cells
+        pmf_home, pmf_away = poisson_pmf(home_exp), poisson_pmf(away_exp)
+        home_win = pmf_home @ HOME_WIN_CELLS @ pmf_away
+        draw = pmf_home @ pmf_away
+        away_win = pmf_home @ AWAY_WIN_CELLS @ pmf_away
         
         # Normalize
         total = home_win + draw + away_win
@@ -174,9 +226,41 @@ class SimpleDixonColes:
             away_win /= total
         
         return {
-            'home_win_prob': home_win,
-            'draw_prob': draw,
-            'away_win_prob': away_win,
+            'home_win_prob': float(home_win),
+            'draw_prob': float(draw),
+            'away_win_prob': float(away_win),
+            'expected_home_goals': home_exp,
+            'expected_away_goals': away_exp
+        }
+    
+    def predict_batch(self, home_teams, away_teams):
+        """Make predictions for many matches at once (dictionary of arrays, one element per match)"""
+        # Gather the float32 team parameters by id, then compute in float64
+        home_idx = self.team_indices(home_teams)
+        away_idx = self.team_indices(away_teams)
+        home_attack = np.take(self.attack, home_idx).astype(np.float64)
+        home_defense = np.take(self.defense, home_idx).astype(np.float64)
+        away_attack = np.take(self.attack, away_idx).astype(np.float64)
+        away_defense = np.take(self.defense, away_idx).astype(np.float64)
+        
+        # Expected goals, with home advantage
+        home_exp = home_attack * (1 + self.home_advantage) * away_defense
+        away_exp = away_attack * home_defense
+        
+        # Outcome probabilities per match, without the (N, MAX_GOALS + 1, MAX_GOALS + 1) grid
+        pmf_home, pmf_away = poisson_pmf_batch(home_exp), poisson_pmf_batch(away_exp)
+        home_win = np.einsum('ni,ij,nj->n', pmf_home, HOME_WIN_CELLS, pmf_away)
+        draw = np.einsum('ni,ni->n', pmf_home, pmf_away)
+        away_win = np.einsum('ni,ij,nj->n', pmf_home, AWAY_WIN_CELLS, pmf_away)
+        
+        # Normalize
+        total = home_win + draw + away_win
+        total[total == 0] = 1.0
+        
+        return {
+            'home_win_prob': home_win / total,
+            'draw_prob': draw / total,
+            'away_win_prob': away_win / total,
             'expected_home_goals': home_exp,
             'expected_away_goals': away_exp
         }
@@ -205,12 +289,14 @@ def main():
             return
         
         # Split data
-        split_idx = int(len(matches) * 0.8)
-        train_matches = matches[:split_idx]
-        test_matches = matches[split_idx:]
+        n_matches = len(matches['fixture_id'])
+        split_idx = int(n_matches * 0.8)
+        train_matches = slice_matches(matches, slice(None, split_idx))
+        test_matches = slice_matches(matches, slice(split_idx, None))
+        n_train, n_test = split_idx, n_matches - split_idx
         
-        print(f"  - Training: {len(train_matches)} matches")
-        print(f"  - Testing: {len(test_matches)} matches")
+        print(f"  - Training: {n_train} matches")
+        print(f"  - Testing: {n_test} matches")
         
         # Train model
         model = SimpleDixonColes(xi=0.0065, home_advantage=0.3)
@@ -219,28 +305,33 @@ def main():
         # Make predictions
         print("\n[5/6] Making predictions...")
         predictions = []
-        brier_scores = []
         
-        for i, match in enumerate(test_matches):
-            fixture_id, home_team, away_team, home_goals, away_goals, match_date = match
+        # Predict every test match in one vectorized batch
+        home_teams = test_matches['teams'][test_matches['home_idx']]
+        away_teams = test_matches['teams'][test_matches['away_idx']]
+        batch = model.predict_batch(home_teams, away_teams)
+        
+        # Brier scores of all matches at once: actual result one-hot as H/D/A columns 0/1/2
+        probs = np.stack([batch['home_win_prob'], batch['draw_prob'], batch['away_win_prob']], axis=1)
+        goal_diff = test_matches['home_goals'].astype(np.int32) - test_matches['away_goals']
+        outcome = 1 - np.sign(goal_diff)
+        actual = np.zeros_like(probs)
+        actual[np.arange(n_test), outcome] = 1.0
+        brier_all = ((probs - actual) ** 2).sum(axis=1) / 3.0
+        avg_brier = brier_all.mean()
+        
+        # As Python floats: psycopg2 can't quote NumPy 2 scalars when the predictions are stored
+        batch = {key: values.tolist() for key, values in batch.items()}
+        brier_scores = brier_all.tolist()
+        
+        for i, fixture_id in enumerate(test_matches['fixture_id']):
+            home_team, away_team = home_teams[i], away_teams[i]
+            home_goals, away_goals = test_matches['home_goals'][i], test_matches['away_goals'][i]
+            actual_result = 'HDA'[outcome[i]]
+            brier = brier_scores[i]
             
-            # Get prediction
-            pred = model.predict(home_team, away_team)
-            
-            # Determine actual result
-            if home_goals > away_goals:
-                actual_result = 'H'
-            elif home_goals < away_goals:
-                actual_result = 'A'
-            else:
-                actual_result = 'D'
-            
-            # Calculate Brier score
-            brier = model.calculate_brier(
-                (pred['home_win_prob'], pred['draw_prob'], pred['away_win_prob']),
-                actual_result
-            )
-            brier_scores.append(brier)
+            # This match's slice of the batch prediction
+            pred = {key: values[i] for key, values in batch.items()}
             
             # Store for database
             predictions.append({
@@ -264,7 +355,6 @@ def main():
                 print(f"    Brier: {brier:.4f}")
         
         # Statistics
-        avg_brier = np.mean(brier_scores)
         print(f"\n  Average Brier Score: {avg_brier:.4f}")
         print(f"  Random baseline: 0.222")
         
@@ -275,42 +365,42 @@ def main():
         
         # Store to database
         print("\n[6/6] Storing predictions...")
+        rows = [(
+            pred['fixture_id'],
+            pred['home_team'],
+            pred['away_team'],
+            pred['home_win_prob'],
+            pred['draw_prob'],
+            pred['away_win_prob'],
+            pred['expected_home_goals'],
+            pred['expected_away_goals'],
+            pred['brier_score']
+        ) for pred in predictions]
+        
+        # All rows in multi-row INSERTs (one round-trip per 500 predictions)
         stored_count = 0
-        
-        for pred in predictions:
-            try:
-                cursor.execute("""
-                    INSERT INTO features.match_features_simple 
-                    (fixture_id, home_team, away_team, 
-                     home_win_prob, draw_prob, away_win_prob,
-                     expected_home_goals, expected_away_goals, brier_score, calculated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                    ON CONFLICT (fixture_id) DO UPDATE SET
-                        home_team = EXCLUDED.home_team,
-                        away_team = EXCLUDED.away_team,
-                        home_win_prob = EXCLUDED.home_win_prob,
-                        draw_prob = EXCLUDED.draw_prob,
-                        away_win_prob = EXCLUDED.away_win_prob,
-                        expected_home_goals = EXCLUDED.expected_home_goals,
-                        expected_away_goals = EXCLUDED.expected_away_goals,
-                        brier_score = EXCLUDED.brier_score,
-                        calculated_at = EXCLUDED.calculated_at
-                """, (
-                    pred['fixture_id'],
-                    pred['home_team'],
-                    pred['away_team'],
-                    pred['home_win_prob'],
-                    pred['draw_prob'],
-                    pred['away_win_prob'],
-                    pred['expected_home_goals'],
-                    pred['expected_away_goals'],
-                    pred['brier_score']
-                ))
-                stored_count += 1
-            except Exception as e:
-                print(f"  Warning: Could not store {pred['fixture_id']}: {e}")
-                conn.rollback()
-                continue
+        try:
+            execute_values(cursor, """
+                INSERT INTO features.match_features_simple 
+                (fixture_id, home_team, away_team, 
+                 home_win_prob, draw_prob, away_win_prob,
+                 expected_home_goals, expected_away_goals, brier_score, calculated_at)
+                VALUES %s
+                ON CONFLICT (fixture_id) DO UPDATE SET
+                    home_team = EXCLUDED.home_team,
+                    away_team = EXCLUDED.away_team,
+                    home_win_prob = EXCLUDED.home_win_prob,
+                    draw_prob = EXCLUDED.draw_prob,
+                    away_win_prob = EXCLUDED.away_win_prob,
+                    expected_home_goals = EXCLUDED.expected_home_goals,
+                    expected_away_goals = EXCLUDED.expected_away_goals,
+                    brier_score = EXCLUDED.brier_score,
+                    calculated_at = EXCLUDED.calculated_at
+            """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())", page_size=500)
+            stored_count = len(rows)
+        except Exception as e:
+            print(f"  Warning: Could not store predictions: {e}")
+            conn.rollback()
         
         conn.commit()
         print(f"  Stored {stored_count} predictions")
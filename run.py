@@ -2,7 +2,8 @@
 """
 run.py - Simple root runner that calls the main runner in src/
 """
-import subprocess
+import os
+import runpy
 import sys
 
 if __name__ == "__main__":
@@ -11,8 +12,11 @@ if __name__ == "__main__":
     print("Redirecting to src/run.py...")
     print("-" * 40)
     
-    # Run src/run.py with the same arguments
-    result = subprocess.run([sys.executable, "src/run.py"] + sys.argv[1:])
+    # Run src/run.py with the same arguments, in this interpreter rather than a child process,
+    # set up as if it had been started directly
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "run.py")
+    sys.argv = [script] + sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(script))
     
-    # Exit with the same code
-    sys.exit(result.returncode)
+    # A sys.exit() in the script exits with the same code
+    runpy.run_path(script, run_name="__main__")
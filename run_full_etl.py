@@ -4,7 +4,10 @@ Run full historical ETL for all leagues and seasons
 """
 import sys
 import os
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 
 # Add src to path
@@ -21,14 +24,22 @@ def setup_logging():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = os.path.join(logs_dir, f"etl_full_{timestamp}.log")
     
-    # Configure logging
+    # Configure logging: records are only queued on the calling thread, and a background
+    # listener thread does the file and console writes (flushed at exit)
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(
+        log_queue,
+        logging.FileHandler(log_file),
+        logging.StreamHandler(),
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
+        handlers=[QueueHandler(log_queue)]
     )
     
     return logging.getLogger(__name__)
@@ -1,14 +1,31 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import sqlite3
+import io
 import os
+from pathlib import Path
 import matplotlib.pyplot as plt
 from difflib import SequenceMatcher
 
+try:
+    # Optional: Arrow-native SQLite reads (falls back to pandas.read_sql_query)
+    from adbc_driver_sqlite import dbapi as adbc_sqlite
+except ImportError:
+    adbc_sqlite = None
+
+try:
+    # Optional: C-accelerated string similarity (falls back to difflib)
+    from rapidfuzz import fuzz
+    from rapidfuzz.process import cpdist
+except ImportError:
+    cpdist = None
+
 # Paths (adjust if needed based on repo structure)
 SQLITE_DB_PATH = 'data/football_final.db'
 ALPHABETTING_SAMPLE_CSV = 'existing_system/data/EnglishPremierLeague.csv'  # Example sample from submodule
 DEBUG_REPORT_PATH = 'logs/debug_report.csv'
+SAVE_DEBUG_REPORT = bool(os.getenv('SAVE_DEBUG_REPORT'))  # Also write the report to DEBUG_REPORT_PATH
 
 # Schema mapping from project docs
 SCHEMA_MAPPING = {
@@ -24,6 +41,15 @@ SCHEMA_MAPPING = {
     'status': 'fixtures.status'
 }
 
+@st.cache_resource
+def get_sqlite_connection(db_path):
+    """Open a read-only SQLite connection once and reuse it across reruns"""
+    db_uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    if adbc_sqlite is not None:
+        return adbc_sqlite.connect(db_uri)
+    # Reruns execute on different script threads
+    return sqlite3.connect(db_uri, uri=True, check_same_thread=False)
+
 @st.cache_data
 def load_sqlite_data(db_path):
     """Load data from SQLite and transform to DataFrame"""
@@ -31,7 +57,7 @@ def load_sqlite_data(db_path):
         st.error(f"SQLite DB not found at {db_path}")
         return pd.DataFrame()
     
-    conn = sqlite3.connect(db_path)
+    conn = get_sqlite_connection(db_path)
     
     # FIXED QUERY: Removed restrictive WHERE clause
     query = """
@@ -52,16 +78,20 @@ def load_sqlite_data(db_path):
     """
     
     try:
-        df = pd.read_sql_query(query, conn)
-        # Format date
+        if adbc_sqlite is not None:
+            # Columns stream straight into Arrow buffers instead of per-row Python tuples
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+                df = cursor.fetch_arrow_table().to_pandas()
+        else:
+            df = pd.read_sql_query(query, conn)
+        # Format date (stored as ISO-8601 text: parse with the known format, not per-value inference)
         if not df.empty and 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+            df['date'] = pd.to_datetime(df['date'], format='ISO8601', cache=True, errors='coerce').dt.strftime('%Y-%m-%d')
         st.success(f"✅ Loaded {len(df)} records from ACTUAL schema.")
     except Exception as e:
         st.error(f"❌ Query failed: {e}")
         df = pd.DataFrame()
-    finally:
-        conn.close()
     
     return df
 
@@ -73,10 +103,11 @@ def load_alphabetting_sample(csv_path):
         return pd.DataFrame()
     
     try:
-        df = pd.read_csv(csv_path)
+        # Header only: the data is read below, restricted to the mapped columns
+        header = pd.read_csv(csv_path, nrows=0).columns
         
         # Show what columns are actually available for debugging
-        st.sidebar.write("📋 Sample CSV Columns:", df.columns.tolist())
+        st.sidebar.write("📋 Sample CSV Columns:", header.tolist())
         
         # Define flexible column mapping (common variants)
         column_mapping = {
@@ -88,18 +119,26 @@ def load_alphabetting_sample(csv_path):
             'B365H': ['B365H', 'home_odds', 'OddsH', 'H']
         }
         
-        # Find and rename columns
-        renamed_cols = {}
-        for target_col, possible_sources in column_mapping.items():
-            for source_col in possible_sources:
-                if source_col in df.columns:
-                    renamed_cols[source_col] = target_col
-                    break  # Use first match
+        # Find and rename columns in one pass over the header: each source column maps to
+        # its target and priority, and the first-listed variant present wins
+        source_lookup = {source_col: (target_col, priority)
+                         for target_col, possible_sources in column_mapping.items()
+                         for priority, source_col in enumerate(possible_sources)}
+        best_sources = {}
+        for source_col in header:
+            if source_col in source_lookup:
+                target_col, priority = source_lookup[source_col]
+                if target_col not in best_sources or priority < best_sources[target_col][1]:
+                    best_sources[target_col] = (source_col, priority)
+        renamed_cols = {best_sources[target_col][0]: target_col
+                        for target_col in column_mapping if target_col in best_sources}
         
         if not renamed_cols:
             st.error("No recognizable columns found in sample CSV")
             return pd.DataFrame()
         
+        df = pd.read_csv(csv_path, usecols=list(renamed_cols))
+        
         # Select and rename
         df = df[list(renamed_cols.keys())].copy()
         df.rename(columns=renamed_cols, inplace=True)
@@ -110,6 +149,12 @@ def load_alphabetting_sample(csv_path):
         st.error(f"Failed to load sample CSV: {e}")
         return pd.DataFrame()
 
+def string_similarities(ours, samples):
+    """Similarity ratios (0-1) of two equal-length lists of strings, pair by pair"""
+    if cpdist is not None:
+        return cpdist(ours, samples, scorer=fuzz.ratio) / 100
+    return [SequenceMatcher(None, a, b).ratio() for a, b in zip(ours, samples)]
+
 def compare_dataframes(df_our, df_sample):
     """Compare DataFrames and highlight discrepancies"""
     discrepancies = {}
@@ -136,8 +181,20 @@ def compare_dataframes(df_our, df_sample):
     if not df_our.empty and not df_sample.empty:
         sample_row = df_sample.iloc[0]
         our_row = df_our.iloc[0]
-        for col in common_cols:
-            similarity = SequenceMatcher(None, str(our_row[col]), str(sample_row[col])).ratio()
+        cols = list(common_cols)
+        
+        # Numeric values that already match need no string comparison
+        numeric_cols = [col for col in cols
+                        if pd.api.types.is_numeric_dtype(df_our[col]) and pd.api.types.is_numeric_dtype(df_sample[col])]
+        if numeric_cols:
+            close = np.isclose(our_row[numeric_cols].astype(float), sample_row[numeric_cols].astype(float),
+                               equal_nan=True)
+            matching = set(np.array(numeric_cols)[close])
+            cols = [col for col in cols if col not in matching]
+        
+        similarities = string_similarities([str(our_row[col]) for col in cols],
+                                           [str(sample_row[col]) for col in cols]) if cols else []
+        for col, similarity in zip(cols, similarities):
             if similarity < 0.8:
                 discrepancies.setdefault('value_discrepancies', []).append(
                     f"{col}: low similarity ({similarity:.2f})"
@@ -145,24 +202,43 @@ def compare_dataframes(df_our, df_sample):
     
     return discrepancies
 
+@st.cache_data
 def visualize_comparison(df_our, df_sample):
     """Visualize data distributions"""
     fig, ax = plt.subplots()
     if 'FTHG' in df_our.columns and 'FTHG' in df_sample.columns:
-        df_our['FTHG'].hist(ax=ax, alpha=0.5, label='Our Data')
-        df_sample['FTHG'].hist(ax=ax, alpha=0.5, label='AlphaBetting Sample')
+        our_goals = df_our['FTHG'].dropna().to_numpy(dtype=float)
+        sample_goals = df_sample['FTHG'].dropna().to_numpy(dtype=float)
+        
+        # Shared bins over both datasets, so the two distributions line up bar for bar
+        edges = np.histogram_bin_edges(np.concatenate([our_goals, sample_goals]), bins=10)
+        centers = (edges[:-1] + edges[1:]) / 2
+        widths = np.diff(edges)
+        for goals, label in ((our_goals, 'Our Data'), (sample_goals, 'AlphaBetting Sample')):
+            counts, _ = np.histogram(goals, edges)
+            ax.bar(centers, counts, width=widths, alpha=0.5, label=label)
         ax.legend()
         ax.set_title('Home Goals Distribution Comparison')
     return fig
 
-def export_report(discrepancies, df_our, df_sample):
-    """Export debug report"""
+@st.cache_data
+def report_csv(discrepancies):
+    """Serialize the debug report to CSV bytes in memory"""
     report_df = pd.DataFrame({
         'Category': list(discrepancies.keys()),
         'Details': [', '.join(v) if isinstance(v, list) else v for v in discrepancies.values()]
     })
-    report_df.to_csv(DEBUG_REPORT_PATH, index=False)
-    return DEBUG_REPORT_PATH
+    buf = io.BytesIO()
+    report_df.to_csv(buf, index=False)
+    return buf.getvalue()
+
+def export_report(discrepancies, df_our, df_sample):
+    """Export debug report as CSV bytes (also saved to disk if SAVE_DEBUG_REPORT is set)"""
+    report = report_csv(discrepancies)
+    if SAVE_DEBUG_REPORT:
+        with open(DEBUG_REPORT_PATH, 'wb') as f:
+            f.write(report)
+    return report
 
 # Streamlit Dashboard
 st.title("AlphaBetting Integration Debugging Dashboard")
@@ -207,8 +283,9 @@ if not df_our.empty and not df_sample.empty:
 st.header("Step 4: Export Debug Report")
 if st.button("Generate and Export Report"):
     if not df_our.empty and not df_sample.empty:
-        report_path = export_report(discrepancies, df_our, df_sample)
-        st.success(f"Report exported to {report_path}")
-        st.download_button("Download Report", data=open(report_path, 'rb'), file_name='debug_report.csv')
+        report = export_report(discrepancies, df_our, df_sample)
+        if SAVE_DEBUG_REPORT:
+            st.success(f"Report exported to {DEBUG_REPORT_PATH}")
+        st.download_button("Download Report", data=report, file_name='debug_report.csv', mime='text/csv')
     else:
         st.error("Data required for report.")
\ No newline at end of file
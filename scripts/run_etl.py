@@ -4,7 +4,10 @@ from datetime import datetime
 AlphaBetting ETL Pipeline - Main Entry Point
 """
 import sys
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 # Add src to path
@@ -21,13 +24,22 @@ def setup_logging():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = log_dir / f"etl_{timestamp}.log"
     
+    # Records are only queued on the calling thread; a background listener thread does the
+    # file and console writes (flushed at exit)
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(
+        log_queue,
+        logging.FileHandler(log_file, encoding='utf-8'),
+        logging.StreamHandler(sys.stdout),
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
+        handlers=[QueueHandler(log_queue)]
     )
     
     # Suppress noisy logs
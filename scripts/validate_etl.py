@@ -3,35 +3,70 @@
 Validate ETL Results
 """
 import sys
-import psycopg2
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from etl.config import ConfigManager
 
+# Connections shared by the concurrent validation counts (one is kept for the quality checks)
+POOL_MAX_CONNECTIONS = 8
+
+# Server-side prepared quality checks, kept by the pooled connections across validation runs
+QUALITY_QUERIES = [
+    # Check for NULL goals
+    ("null_goals", """
+        SELECT COUNT(*) FROM raw.fixtures 
+        WHERE home_goals IS NULL OR away_goals IS NULL
+    """),
+    # Check for duplicate fixtures
+    ("duplicates", """
+        SELECT COUNT(*) FROM (
+            SELECT external_id, source_system, COUNT(*)
+            FROM raw.fixtures 
+            GROUP BY external_id, source_system 
+            HAVING COUNT(*) > 1
+        ) as duplicates
+    """),
+]
+
+# Validation counts that only need a table size, by (schema, table)
+ESTIMATED_TABLES = {
+    "Total fixtures": ("raw", "fixtures"),
+    "Total teams": ("raw", "teams"),
+    "Total leagues": ("raw", "leagues"),
+    "Total odds snapshots": ("raw", "odds_snapshots"),
+}
+
+def count_rows(pool, query):
+    """Run a single-value COUNT query on a connection borrowed from the pool"""
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchone()[0]
+    finally:
+        pool.putconn(conn)
+
 def validate_etl():
     """Validate ETL results"""
     print("=" * 60)
     print("VALIDATING ETL RESULTS")
     print("=" * 60)
     
-    config = ConfigManager().config
+    conn = None
     
     try:
-        # Connect to database
-        conn = psycopg2.connect(
-            host=config['database'].host,
-            port=config['database'].port,
-            database=config['database'].name,
-            user=config['database'].user,
-            password=config['database'].password or 'betting_password'
-        )
+        # Borrow a connection from the shared pool, reused across validation runs in this process
+        pool = ConfigManager().get_pool(POOL_MAX_CONNECTIONS)
+        conn = pool.getconn()
         cursor = conn.cursor()
         
         print("✅ Connected to database")
         
-        # Run validation queries
+        # Run validation queries. Plain table sizes come from the planner statistics below;
+        # these exact counts are only the fallback for tables that were never analyzed
         validation_queries = [
             ("Total fixtures", "SELECT COUNT(*) FROM raw.fixtures"),
             ("Total teams", "SELECT COUNT(*) FROM raw.teams"),
@@ -48,38 +83,48 @@ def validate_etl():
             ("ETL statistics", "SELECT COUNT(*) FROM monitoring.etl_statistics"),
         ]
         
-        results = {}
-        for name, query in validation_queries:
-            cursor.execute(query)
-            count = cursor.fetchone()[0]
-            results[name] = count
-            print(f"  {name}: {count}")
+        # Approximate sizes of the plain tables from pg_class.reltuples (one catalog lookup instead
+        # of a scan per table); reltuples is -1 until the table is first analyzed
+        cursor.execute("""
+            SELECT n.nspname, c.relname, c.reltuples::bigint
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE (n.nspname, c.relname) IN %s AND c.reltuples >= 0
+        """, (tuple(ESTIMATED_TABLES.values()),))
+        estimates = {(schema, table): count for schema, table, count in cursor.fetchall()}
+        results = {name: estimates[table] for name, table in ESTIMATED_TABLES.items() if table in estimates}
+        estimated_names = set(results)
+        pending_queries = [(name, query) for name, query in validation_queries if name not in estimated_names]
         
-        # Check data quality
-        print("\n DATA QUALITY CHECKS:")
+        # The counts are independent scans: run them concurrently on pooled connections
+        with ThreadPoolExecutor(max_workers=POOL_MAX_CONNECTIONS - 1) as executor:
+            futures = [executor.submit(count_rows, pool, query) for _, query in pending_queries]
+            
+            # Meanwhile, run the quality checks on this connection as server-side prepared
+            # statements, parsed (in a single round-trip) only if this connection hasn't yet
+            cursor.execute("SELECT name FROM pg_prepared_statements")
+            prepared = {name for name, in cursor.fetchall()}
+            to_prepare = [(name, query) for name, query in QUALITY_QUERIES if f"q_{name}" not in prepared]
+            if to_prepare:
+                cursor.execute(";".join(f"PREPARE q_{name} AS {query}" for name, query in to_prepare))
+            cursor.execute("EXECUTE q_null_goals")
+            null_goals = cursor.fetchone()[0]
+            cursor.execute("EXECUTE q_duplicates")
+            duplicates = cursor.fetchone()[0]
+            
+            for (name, _), future in zip(pending_queries, futures):
+                results[name] = future.result()
         
-        # Check for NULL goals
-        cursor.execute("""
-            SELECT COUNT(*) FROM raw.fixtures 
-            WHERE home_goals IS NULL OR away_goals IS NULL
-        """)
-        null_goals = cursor.fetchone()[0]
-        print(f"  Fixtures with NULL goals: {null_goals}")
+        for name, _ in validation_queries:
+            approximate = "~" if name in estimated_names else ""
+            print(f"  {name}: {approximate}{results[name]}")
         
-        # Check for duplicate fixtures
-        cursor.execute("""
-            SELECT COUNT(*) FROM (
-                SELECT external_id, source_system, COUNT(*)
-                FROM raw.fixtures 
-                GROUP BY external_id, source_system 
-                HAVING COUNT(*) > 1
-            ) as duplicates
-        """)
-        duplicates = cursor.fetchone()[0]
+        # Check data quality
+        print("\n📊 DATA QUALITY CHECKS:")
+        print(f"  Fixtures with NULL goals: {null_goals}")
         print(f"  Duplicate fixtures: {duplicates}")
         
         # Check feature view completeness
-        if results['Feature view matches'] > 0:
+        if results['Feature view matches'] > 0 and results['Total fixtures'] > 0:
             completeness = (results['Feature view matches'] / results['Total fixtures']) * 100
             print(f"  Feature view completeness: {completeness:.1f}%")
         
@@ -93,11 +138,14 @@ def validate_etl():
             print("⚠️  Some issues found (see above)")
         
         cursor.close()
-        conn.close()
         
     except Exception as e:
         print(f"❌ Validation failed: {e}")
         sys.exit(1)
+    
+    finally:
+        if conn is not None:
+            pool.putconn(conn)
 
 if __name__ == "__main__":
     validate_etl()
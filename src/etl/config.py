@@ -2,11 +2,13 @@
 ETL Configuration Management
 """
 import os
+import threading
 import yaml
 import json
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Dict, List, Optional
+from psycopg2.pool import ThreadedConnectionPool
 
 @dataclass
 class DatabaseConfig:
@@ -102,6 +104,8 @@ class ConfigManager:
     """Singleton configuration manager"""
     _instance = None
     _config = None
+    _pool = None
+    _pool_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -160,6 +164,14 @@ class ConfigManager:
     @property
     def etl(self) -> ETLConfig:
         return self._config['etl']
+    
+    def get_pool(self, maxconn: int = 8) -> ThreadedConnectionPool:
+        """Process-wide connection pool for the configured database, created on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    ConfigManager._pool = ThreadedConnectionPool(1, maxconn, self.database.connection_string)
+        return self._pool
 
 # Global configuration instance
 config = ConfigManager().config
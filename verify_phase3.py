@@ -30,10 +30,24 @@ def verify_database():
         print("   PASS: Database connection successful")
         checks_passed += 1
         
+        # Checks 2-4 in a single round-trip
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM raw.fixtures),
+                EXISTS (
+                    SELECT FROM information_schema.schemata 
+                    WHERE schema_name = 'features'
+                ),
+                EXISTS (
+                    SELECT FROM information_schema.tables 
+                    WHERE table_schema = 'features' 
+                    AND table_name = 'match_features'
+                );
+        """)
+        fixture_count, features_exists, table_exists = cursor.fetchone()
+
         # Check 2: Raw fixtures table exists
         print("\n[2/4] Checking raw fixtures table...")
-        cursor.execute("SELECT COUNT(*) FROM raw.fixtures;")
-        fixture_count = cursor.fetchone()[0]
         if fixture_count > 0:
             print(f"   PASS: {fixture_count:,} fixtures found")
             checks_passed += 1
@@ -42,13 +56,6 @@ def verify_database():
         
         # Check 3: Features schema exists
         print("\n[3/4] Checking features schema...")
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.schemata 
-                WHERE schema_name = 'features'
-            );
-        """)
-        features_exists = cursor.fetchone()[0]
         if features_exists:
             print("   PASS: Features schema exists")
             checks_passed += 1
@@ -57,14 +64,6 @@ def verify_database():
         
         # Check 4: Match features table exists
         print("\n[4/4] Checking match_features table...")
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'features' 
-                AND table_name = 'match_features'
-            );
-        """)
-        table_exists = cursor.fetchone()[0]
         if table_exists:
             cursor.execute("SELECT COUNT(*) FROM features.match_features;")
             pred_count = cursor.fetchone()[0]
@@ -78,9 +77,12 @@ def verify_database():
             cursor.execute("SELECT * FROM features.match_features LIMIT 3;")
             samples = cursor.fetchall()
             if samples:
-                print("\nSample predictions:")
-                for sample in samples:
-                    print(f"   Fixture: {sample[0]}, Home: {sample[1]:.3f}, Draw: {sample[2]:.3f}, Away: {sample[3]:.3f}")
+                lines = ["\nSample predictions:"]
+                lines += [
+                    f"   Fixture: {sample[0]}, Home: {sample[1]:.3f}, Draw: {sample[2]:.3f}, Away: {sample[3]:.3f}"
+                    for sample in samples
+                ]
+                sys.stdout.write("\n".join(lines) + "\n")
         
         # Clean up
         cursor.close()